@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сборка JSON плеера для всех авторов каталога (catalog.json)
+Каждый автор собирается в отдельном процессе: свои исходные папки, свои выходные файлы
+и своя цепочка версий, поэтому сборки независимы и идут параллельно.
+С --profile рабочие процессы возвращают замеры своих стадий, и они попадают в общую трассировку
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import profiling
+from catalog import CATALOG_FILE, catalog_path, load_catalog
+from content_delta import publish_version
+from create_volkov_player_json import write_player_json
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+def build_author(author):
+    """
+    Собирает JSON плеера одного автора, возвращает статистику сборки.
+    spans - замеры стадий (имя, начало и длительность в секундах perf_counter, аргументы)
+    для трассировки родительского процесса
+    """
+    start = time.perf_counter()
+    spans = []
+    output_files = [catalog_path(output) for output in author['outputs']]
+    for output_file in output_files:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+    stage_start = time.perf_counter()
+    album_stats = write_player_json(output_files, author)
+    spans.append(('player_json', stage_start, time.perf_counter() - stage_start, {'author': author['id']}))
+
+    result = {
+        'id': author['id'],
+        'authorName': author['authorName'],
+        'outputs': [str(output_file) for output_file in output_files],
+        'albums': album_stats,
+        'version': None
+    }
+    if author.get('versionsDir'):
+        stage_start = time.perf_counter()
+        versions = publish_version(output_files[-1], catalog_path(author['versionsDir']))
+        spans.append(('publish_version', stage_start, time.perf_counter() - stage_start, {'author': author['id']}))
+        result['version'] = versions['version']
+    result['seconds'] = time.perf_counter() - start
+    spans.insert(0, ('build_author', start, result['seconds'], {'author': author['id']}))
+    result['spans'] = spans
+    result['pid'] = os.getpid()
+    return result
+
+def build_catalog(authors, max_workers=MAX_WORKERS):
+    """Собирает всех авторов (в пуле процессов, если авторов больше одного)"""
+    if max_workers <= 1 or len(authors) < 2:
+        results = []
+        for author in authors:
+            # В этом процессе стадии пишет сам профилировщик
+            with profiling.stage('build_author', author=author['id']):
+                results.append(build_author(author))
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(authors))) as pool:
+        results = list(pool.map(build_author, authors))
+    for result in results:
+        for name, started, seconds, args in result['spans']:
+            profiling.add_span(name, started, seconds, pid=result['pid'], **args)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка JSON плеера для всех авторов каталога")
+    parser.add_argument('authors', nargs='*', help="id авторов (без них - все авторы каталога)")
+    parser.add_argument('--catalog', type=Path, default=CATALOG_FILE, help="файл каталога")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="число процессов")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args, 'build_catalog')
+
+    authors = load_catalog(args.catalog)
+    if args.authors:
+        unknown = set(args.authors) - {author['id'] for author in authors}
+        if unknown:
+            parser.error(f"unknown authors: {', '.join(sorted(unknown))}")
+        authors = [author for author in authors if author['id'] in args.authors]
+
+    start = time.perf_counter()
+    results = build_catalog(authors, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'='*60}")
+    for result in results:
+        tracks = sum(count for _, count in result['albums'])
+        version = f", version {result['version']}" if result['version'] else ''
+        print(f"{result['authorName']} ({result['id']}): {len(result['albums'])} albums, "
+              f"{tracks} tracks{version}, {result['seconds']:.2f}s")
+        for album_name, track_count in result['albums']:
+            print(f"  {album_name} - {track_count} tracks")
+        for output_file in result['outputs']:
+            print(f"  ✓ Created {output_file}")
+    print(f"{'='*60}")
+    print(f"Authors: {len(results)}, time: {elapsed:.2f}s")
+    profiling.finish()
+
+if __name__ == '__main__':
+    main()
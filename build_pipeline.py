@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сборка всего конвейера по графу стадий
+Порядок скриптов (извлечение текстов .doc → create_all_files → fix_links → create_all_txt → verify →
+generate_ssilki → JSON плеера → статические артефакты) задан зависимостями стадий. Каждая стадия объявляет входы и выходы
+(шаблоны путей относительно BASE_DIR, сами скрипты - тоже входы); отпечатки их содержимого (sha256)
+хранятся в JSON/build_state.json, и стадия пропускается, если с прошлого запуска не изменились
+ни входы, ни выходы. У каждого файла один владелец: скрипты, правящие файлы на месте
+(fix_links → create_all_txt → verify в VOLKOV2.0), объединены в одну стадию из нескольких шагов.
+Скрипты выполняются отдельными процессами; стадии, не зависящие друг от друга
+(извлечение документов и разбор HTML), идут параллельно
+"""
+
+import argparse
+import functools
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from catalog import BASE_DIR, CATALOG_FILE, load_catalog
+from extract_text_from_docs import file_sha256, load_cache, write_json_if_changed
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# Состояние сборки привязано к машине (кэш хешей по размеру и mtime), поэтому в .gitignore
+STATE_FILE = BASE_DIR / 'JSON' / 'build_state.json'
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+OUTPUT_TAIL = 20
+
+# HTML «Тексты песен» (имя файла с экранированием #UXXXX)
+SONGS_HTML = 'V-VOLKOV/#U0412#U043b*#U043d.html'
+# Минифицированные и сжатые JSON плеера для CDN (build_static_artifacts.py)
+STATIC_DIR = 'VOLKOV2.0/static'
+# Списки ссылок, собранные generate_ssilki по JSON песен; исходные списки альбомов
+# (ssilkiDir) читает create_all_files, поэтому стадия их не перезаписывает
+GENERATED_SSILKI_DIR = 'JSON/ssilki'
+
+def catalog_patterns(catalog_file=CATALOG_FILE):
+    """Входы и выходы сборки JSON плеера по каталогу: папки альбомов, выгрузки Mp3tag, выходные файлы"""
+    inputs = ['catalog.json', 'VOLKOV2.0/mp3_info.json']
+    outputs = []
+    for author in load_catalog(catalog_file):
+        inputs.extend(f"{album['dir']}/*" for album in author['albums'])
+        if author.get('mp3tagDir'):
+            inputs.append(f"{author['mp3tagDir']}/*.html")
+        outputs.extend(author['outputs'])
+    return inputs, outputs
+
+def pipeline_stages(catalog_file=CATALOG_FILE):
+    """
+    Стадии конвейера в порядке выполнения: {name, script | steps, deps, inputs, outputs, requires}.
+    steps - скрипты одной стадии, по очереди правящие одни и те же выходы.
+    requires (у стадии или шага) - пути, без которых стадия или шаг не запускается (например,
+    fix_links без списков ссылок VOLKOV2.0_temp падает); остальные шаги и зависящие стадии
+    тогда работают с уже имеющимися файлами. Стадия может менять только объявленные выходы:
+    fix_links пересоздает лишь папки альбомов VOLKOV2.0/CD*
+    """
+    volkov = {author['id']: author for author in load_catalog(catalog_file)}['volkov']
+    player_inputs, player_outputs = catalog_patterns(catalog_file)
+    return [
+        {'name': 'extract', 'script': 'extract_text_from_docs.py', 'deps': [],
+         'inputs': ['TEXT/*.doc', 'TEXT/*.docx', 'TEXT/*.mp3.json',
+                    'doc_reader.py', 'docx_reader.py', 'verified_texts.py'],
+         'outputs': ['TEXT_EXTRACTED/*.txt', 'TEXT_EXTRACTED/verified/*.txt', 'TEXT_EXTRACTED/index.json']},
+        {'name': 'create_all_files', 'script': 'create_all_files.py', 'deps': [],
+         'inputs': [SONGS_HTML, 'V-VOLKOV/CD */ssilki0*.txt'],
+         'outputs': ['STIHI_VOLKOV/CD*/*']},
+        {'name': 'volkov2', 'deps': ['create_all_files'],
+         'steps': [{'script': 'fix_links_in_json.py', 'requires': ['VOLKOV2.0_temp']},
+                   {'script': 'create_all_txt_files.py'},
+                   {'script': 'verify_and_fix_all_links.py'}],
+         'inputs': ['VOLKOV2.0_temp/ssilki0*.txt', 'VOLKOV2.0/ssilki0*.txt', 'STIHI_VOLKOV/CD*/*'],
+         'outputs': ['VOLKOV2.0/CD*/*']},
+        {'name': 'generate_ssilki', 'script': 'generate_ssilki.py', 'deps': ['create_all_files'],
+         'args': ['--output-dir', str(BASE_DIR / GENERATED_SSILKI_DIR)],
+         'inputs': ['catalog.json'] + [f"{album['poemsDir']}/*.json" for album in volkov['albums']],
+         'outputs': [f"{GENERATED_SSILKI_DIR}/ssilki0{album['number']}.txt" for album in volkov['albums']]},
+        {'name': 'player_json', 'script': 'build_catalog.py', 'deps': ['volkov2'],
+         'inputs': player_inputs + ['create_volkov_player_json.py', 'mp3tag_html.py', 'stah_texts.py',
+                                    'content_delta.py'],
+         'outputs': player_outputs},
+        {'name': 'static_artifacts', 'script': 'build_static_artifacts.py', 'deps': ['player_json'],
+         'inputs': ['catalog.json'] + player_outputs,
+         'outputs': [f"{STATIC_DIR}/*"]},
+    ]
+
+def stage_steps(stage):
+    """Шаги стадии: [{script, args, requires}]; у простой стадии один шаг"""
+    return stage.get('steps') or [{'script': stage['script'], 'args': stage.get('args', [])}]
+
+@functools.lru_cache(maxsize=None)
+def patterns_overlap(first, second):
+    """Найдется ли путь, подходящий под оба шаблона (* - любые символы внутри части пути, кроме /)"""
+    if not first or not second:
+        return (first + second).strip('*') == ''
+    if first[0] == '*' and (patterns_overlap(first[1:], second)
+                            or second[0] != '/' and patterns_overlap(first, second[1:])):
+        return True
+    if second[0] == '*' and (patterns_overlap(first, second[1:])
+                             or first[0] != '/' and patterns_overlap(first[1:], second)):
+        return True
+    return first[0] == second[0] and patterns_overlap(first[1:], second[1:])
+
+def check_stages(stages):
+    """
+    Проверяет, что граф стадий описывает сборку без циклов:
+    зависимости ссылаются на стадии выше по списку; выходы стадии не попадают под входы
+    ее самой и стадий выше (иначе стадия перезаписывала бы свои же или уже учтенные входы);
+    у выходов один владелец; стадия, читающая чужие выходы, зависит от их владельца
+    """
+    seen = {}
+    for index, stage in enumerate(stages):
+        name = stage['name']
+        ancestors = set()
+        for dep in stage['deps']:
+            if dep not in seen:
+                raise ValueError(f"Stage '{name}' depends on '{dep}', which is not defined before it")
+            ancestors |= seen[dep] | {dep}
+        seen[name] = ancestors
+
+        for output in stage['outputs']:
+            for earlier in stages[:index + 1]:
+                for pattern in earlier['inputs']:
+                    if patterns_overlap(output, pattern):
+                        raise ValueError(f"Stage '{name}' writes '{output}', "
+                                         f"which is an input '{pattern}' of stage '{earlier['name']}'")
+                for pattern in earlier['outputs'] if earlier is not stage else []:
+                    if patterns_overlap(output, pattern):
+                        raise ValueError(f"Stages '{earlier['name']}' and '{name}' both write '{output}'")
+
+        for pattern in stage['inputs']:
+            for earlier in stages[:index]:
+                if earlier['name'] not in ancestors and any(patterns_overlap(pattern, output)
+                                                            for output in earlier['outputs']):
+                    raise ValueError(f"Stage '{name}' reads '{pattern}' written by stage "
+                                     f"'{earlier['name']}', but does not depend on it")
+
+def select_stages(stages, targets):
+    """Стадии targets вместе со всеми их зависимостями (в исходном порядке)"""
+    by_name = {stage['name']: stage for stage in stages}
+    unknown = set(targets) - set(by_name)
+    if unknown:
+        raise KeyError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(by_name[name]['deps'])
+    return [stage for stage in stages if stage['name'] in selected]
+
+def fingerprint(digests):
+    """Общий отпечаток набора файлов {путь: sha256}"""
+    payload = ''.join(f"{path}\0{digest}\n" for path, digest in sorted(digests.items()))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class BuildGraph:
+    """
+    Выполнение стадий с учетом зависимостей и отпечатков.
+    Хеши файлов кэшируются по (размер, mtime), поэтому повторный запуск без изменений
+    читает только метаданные файлов
+    """
+
+    def __init__(self, stages, state_file=STATE_FILE, base_dir=BASE_DIR, force=False, verbose=False):
+        check_stages(stages)
+        self.stages = stages
+        self.state_file = state_file
+        self.base_dir = base_dir
+        self.force = force
+        self.verbose = verbose
+        self.state = load_cache(state_file) or {'files': {}, 'stages': {}}
+        self.results = {}
+
+    def file_digests(self, patterns):
+        """{относительный путь: sha256} файлов по шаблонам"""
+        digests = {}
+        for pattern in patterns:
+            for path in sorted(self.base_dir.glob(pattern)):
+                if not path.is_file():
+                    continue
+                relative = path.relative_to(self.base_dir).as_posix()
+                stat = path.stat()
+                cached = self.state['files'].get(relative)
+                if cached is None or cached[:2] != [stat.st_size, stat.st_mtime_ns]:
+                    cached = self.state['files'][relative] = [stat.st_size, stat.st_mtime_ns, file_sha256(path)]
+                digests[relative] = cached[2]
+        return digests
+
+    def stage_fingerprints(self, stage):
+        """Отпечатки входов (включая скрипты стадии) и выходов; выходов нет - None"""
+        inputs = self.file_digests(stage['inputs'])
+        for step in stage_steps(stage):
+            inputs[step['script']] = file_sha256(SCRIPTS_DIR / step['script'])
+        outputs = self.file_digests(stage['outputs'])
+        return fingerprint(inputs), fingerprint(outputs) if outputs else None
+
+    def is_fresh(self, stage, fingerprints):
+        """Стадия не требует запуска: те же входы и нетронутые выходы"""
+        previous = self.state['stages'].get(stage['name'])
+        return (not self.force and fingerprints[1] is not None and previous is not None
+                and [previous['inputs'], previous['outputs']] == list(fingerprints))
+
+    def missing(self, stage):
+        return [path for path in stage.get('requires', []) if not (self.base_dir / path).exists()]
+
+    def run_stage(self, stage):
+        """Запускает шаги стадии по очереди до первой ошибки, возвращает (код возврата, вывод, время)"""
+        start = time.perf_counter()
+        returncode = 0
+        output = ''
+        for step in stage_steps(stage):
+            missing = self.missing(step)
+            if missing:
+                output += f"- {step['script']} skipped (missing {', '.join(missing)})\n"
+                continue
+            process = subprocess.run([sys.executable, str(SCRIPTS_DIR / step['script'])] + step.get('args', []),
+                                     cwd=SCRIPTS_DIR, capture_output=True, text=True)
+            output += process.stdout + process.stderr
+            returncode = process.returncode
+            if returncode:
+                break
+        return returncode, output, time.perf_counter() - start
+
+    def record(self, stage, seconds):
+        """Сохраняет отпечатки входов и выходов после успешного запуска"""
+        inputs, outputs = self.stage_fingerprints(stage)
+        self.state['stages'][stage['name']] = {
+            'inputs': inputs,
+            'outputs': outputs,
+            'seconds': round(seconds, 3),
+            'date': datetime.now().isoformat(timespec='seconds')
+        }
+        write_json_if_changed(self.state_file, self.state)
+
+    def prepare(self, stage):
+        """Решение по стадии, все зависимости которой завершены: статус или None (нужен запуск)"""
+        if any(self.results[dep]['status'] in ('failed', 'skipped') for dep in stage['deps']):
+            return 'skipped'
+        if self.missing(stage):
+            return 'blocked'
+        if self.is_fresh(stage, self.stage_fingerprints(stage)):
+            return 'cached'
+        return None
+
+    def finish(self, stage, status, seconds=0.0, output=''):
+        self.results[stage['name']] = {'status': status, 'seconds': seconds, 'output': output}
+        marks = {'ran': '✓', 'cached': '=', 'blocked': '-', 'skipped': '-', 'failed': '✗'}
+        line = f"{marks[status]} {stage['name']:18} {status}"
+        if status in ('ran', 'failed'):
+            line += f" {seconds:.2f}s"
+        if status == 'blocked':
+            line += f" (missing {', '.join(self.missing(stage))})"
+        print(line)
+        if status == 'failed' or (self.verbose and output):
+            lines = output.rstrip().splitlines()
+            for output_line in (lines if self.verbose else lines[-OUTPUT_TAIL:]):
+                print(f"    {output_line}")
+
+    def build(self, max_workers=MAX_WORKERS):
+        """Выполняет стадии: готовые (все зависимости завершены) запускаются параллельно"""
+        pending = list(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                for stage in [stage for stage in pending if all(dep in self.results for dep in stage['deps'])]:
+                    pending.remove(stage)
+                    status = self.prepare(stage)
+                    if status:
+                        self.finish(stage, status)
+                    else:
+                        running[pool.submit(self.run_stage, stage)] = stage
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    returncode, output, seconds = future.result()
+                    if returncode == 0:
+                        self.record(stage, seconds)
+                        self.finish(stage, 'ran', seconds, output)
+                    else:
+                        self.finish(stage, 'failed', seconds, output)
+        return self.results
+
+    def plan(self):
+        """Что будет выполнено, без запуска: стадия запустится, если изменились ее файлы или запустится зависимость"""
+        will_run = set()
+        plan = []
+        for stage in self.stages:
+            if self.missing(stage):
+                status = 'blocked'
+            elif (any(dep in will_run for dep in stage['deps'])
+                  or not self.is_fresh(stage, self.stage_fingerprints(stage))):
+                status = 'run'
+                will_run.add(stage['name'])
+            else:
+                status = 'cached'
+            plan.append((stage['name'], status))
+        return plan
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка конвейера по графу стадий с пропуском неизмененных")
+    parser.add_argument('targets', nargs='*', help="стадии для сборки (вместе с зависимостями; без них - все)")
+    parser.add_argument('--force', action='store_true', help="выполнить стадии независимо от отпечатков")
+    parser.add_argument('--dry-run', action='store_true', help="только показать, какие стадии будут выполнены")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="число параллельных стадий")
+    parser.add_argument('--state', type=Path, default=STATE_FILE, help="файл отпечатков")
+    parser.add_argument('--verbose', action='store_true', help="печатать вывод скриптов")
+    args = parser.parse_args()
+
+    stages = pipeline_stages()
+    if args.targets:
+        try:
+            stages = select_stages(stages, args.targets)
+        except KeyError as e:
+            parser.error(e.args[0])
+    graph = BuildGraph(stages, args.state, force=args.force, verbose=args.verbose)
+
+    if args.dry_run:
+        for name, status in graph.plan():
+            print(f"  {name:18} {status}")
+        return
+
+    start = time.perf_counter()
+    results = graph.build(args.workers)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for result in results.values():
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    print(f"{'='*60}")
+    print(f"Stages: {', '.join(f'{status} {count}' for status, count in counts.items())}; time: {elapsed:.2f}s")
+    print(f"✓ Saved {args.state}")
+    if counts.get('failed'):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
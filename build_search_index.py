@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Построение инвертированного поискового индекса по текстам песен плеера
+Термы -> номера строк (глобальные, с дельта-кодированием), чтобы плеер
+находил слова и префиксы без перебора всех текстов
+"""
+
+import argparse
+import bisect
+import json
+import re
+from pathlib import Path
+
+SEARCH_INDEX_VERSION = 1
+
+WORD_PATTERN = re.compile(r'[0-9a-zа-я]+')
+
+# Окончания для лёгкого стемминга, от длинных к коротким
+RUSSIAN_SUFFIXES = sorted([
+    'ейшими', 'ейшего', 'ейшему', 'ейшая', 'ейшие', 'ейший',
+    'ающий', 'яющий', 'ивший', 'ывший', 'ующий',
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ать', 'ять', 'еть', 'ить',
+    'ешь', 'ишь', 'ете', 'ите', 'ает', 'яет', 'ует', 'ают', 'яют', 'уют',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ую', 'юю',
+    'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'их', 'ых', 'ть', 'ет', 'ит',
+    'ут', 'ют', 'ат', 'ят', 'ся', 'сь', 'ла', 'ли', 'ло',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й'
+], key=len, reverse=True)
+
+MIN_STEM_LENGTH = 3
+
+def normalize_text(text):
+    """Нижний регистр и замена ё на е"""
+    return text.lower().replace('ё', 'е')
+
+def stem_word(word):
+    """Отсекает самое длинное подходящее окончание, оставляя основу не короче MIN_STEM_LENGTH"""
+    for suffix in RUSSIAN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text, stem=False):
+    """Разбивает строку на нормализованные термы без пунктуации"""
+    words = WORD_PATTERN.findall(normalize_text(text))
+    if stem:
+        words = [stem_word(word) for word in words]
+    return words
+
+def delta_encode(values):
+    """[5, 7, 12] -> [5, 2, 5]"""
+    result = []
+    previous = 0
+    for value in values:
+        result.append(value - previous)
+        previous = value
+    return result
+
+def delta_decode(deltas):
+    """[5, 2, 5] -> [5, 7, 12]"""
+    result = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        result.append(total)
+    return result
+
+def build_search_index(stihi, stem=False):
+    """
+    Строит индекс по stihi[].text.
+    Строки всех песен нумеруются подряд; lineOffsets[i] - номер первой строки песни i
+    """
+    postings = {}
+    line_offsets = []
+    line_id = 0
+
+    for entry in stihi:
+        line_offsets.append(line_id)
+        for line in entry['text']:
+            for term in tokenize(line, stem):
+                term_lines = postings.setdefault(term, [])
+                if not term_lines or term_lines[-1] != line_id:
+                    term_lines.append(line_id)
+            line_id += 1
+
+    terms = sorted(postings)
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "stemmed": stem,
+        "lineCount": line_id,
+        "lineOffsets": line_offsets,
+        "terms": terms,
+        "postings": [delta_encode(postings[term]) for term in terms]
+    }
+
+def locate_line(index, line_id):
+    """Глобальный номер строки -> (номер песни, номер строки в песне)"""
+    poem = bisect.bisect_right(index['lineOffsets'], line_id) - 1
+    return poem, line_id - index['lineOffsets'][poem]
+
+def lookup_term(index, term, prefix=False):
+    """Глобальные номера строк для терма (или всех термов с этим префиксом)"""
+    terms = index['terms']
+    start = bisect.bisect_left(terms, term)
+
+    if not prefix:
+        if start < len(terms) and terms[start] == term:
+            return delta_decode(index['postings'][start])
+        return []
+
+    line_ids = set()
+    position = start
+    while position < len(terms) and terms[position].startswith(term):
+        line_ids.update(delta_decode(index['postings'][position]))
+        position += 1
+    return sorted(line_ids)
+
+def search(index, query, prefix=False):
+    """
+    Ищет песни, содержащие все слова запроса.
+    Возвращает {номер песни: [номера совпавших строк]}
+    """
+    words = tokenize(query, index['stemmed'])
+    if not words:
+        return {}
+
+    result = None
+    for word in words:
+        matches = {}
+        for line_id in lookup_term(index, word, prefix):
+            poem, line = locate_line(index, line_id)
+            matches.setdefault(poem, set()).add(line)
+
+        if result is None:
+            result = matches
+        else:
+            result = {poem: result[poem] | lines for poem, lines in matches.items() if poem in result}
+
+    return {poem: sorted(lines) for poem, lines in sorted(result.items())}
+
+def main():
+    parser = argparse.ArgumentParser(description="Построение поискового индекса для плеера")
+    parser.add_argument('--stem', action='store_true', help="лёгкий стемминг русских окончаний")
+    args = parser.parse_args()
+
+    content_file = Path('/home/user/VLK/VOLKOV2.0/content.json')
+    output_file = Path('/home/user/VLK/VOLKOV2.0/search_index.json')
+
+    print("Building search index...\n")
+
+    with open(content_file, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+
+    index = build_search_index(content['stihi'], stem=args.stem)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+    postings_count = sum(len(postings) for postings in index['postings'])
+
+    print(f"{'='*60}")
+    print(f"✓ Created {output_file}")
+    print(f"{'='*60}")
+    print(f"\nStatistics:")
+    print(f"  Poems:    {len(index['lineOffsets'])}")
+    print(f"  Lines:    {index['lineCount']}")
+    print(f"  Terms:    {len(index['terms'])}")
+    print(f"  Postings: {postings_count}")
+    print(f"  Stemmed:  {index['stemmed']}")
+    print(f"  Size:     {output_file.stat().st_size} bytes")
+
+if __name__ == '__main__':
+    main()
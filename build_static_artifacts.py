@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Подготовка статических артефактов JSON для плеера
+Минифицированный детерминированный JSON, сжатые .gz и .xz варианты
+и манифест с SHA-256/ETag и размерами файлов для CDN.
+Исходные файлы берутся из каталога: по одному выходному JSON на автора (последний из outputs -
+тот же, что публикуется версиями; остальные выходы автора - его копии)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import lzma
+from pathlib import Path
+
+from catalog import CATALOG_FILE, catalog_path, load_catalog
+
+OUTPUT_DIR = Path('/home/user/VLK/VOLKOV2.0/static')
+
+def source_files(catalog_file=CATALOG_FILE):
+    """JSON плеера авторов каталога; имена файлов должны быть различны - по ним называются артефакты"""
+    files = [catalog_path(author['outputs'][-1]) for author in load_catalog(catalog_file) if author['outputs']]
+    names = [source_file.name for source_file in files]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Player JSON outputs share file names: {', '.join(duplicates)}")
+    return files
+
+def minify_json(data):
+    """Детерминированная сериализация: сортированные ключи, без пробелов"""
+    text = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return text.encode('utf-8')
+
+def compress_gzip(payload):
+    """gzip с максимальным уровнем и нулевым mtime для воспроизводимости"""
+    return gzip.compress(payload, compresslevel=9, mtime=0)
+
+def compress_xz(payload):
+    """xz с максимальным пресетом"""
+    return lzma.compress(payload, preset=9 | lzma.PRESET_EXTREME)
+
+def describe(payload):
+    """Размер, SHA-256 и ETag для массива байтов"""
+    digest = hashlib.sha256(payload).hexdigest()
+    return {
+        "size": len(payload),
+        "sha256": digest,
+        "etag": f'"{digest[:32]}"'
+    }
+
+def write_if_changed(path, payload):
+    """Записывает файл, только если содержимое изменилось"""
+    if path.exists() and path.read_bytes() == payload:
+        return False
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return True
+
+def build_artifacts(source_file, output_dir):
+    """Создает .json, .json.gz и .json.xz для одного файла, возвращает запись манифеста"""
+    with open(source_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    payload = minify_json(data)
+    variants = {
+        '': payload,
+        '.gz': compress_gzip(payload),
+        '.xz': compress_xz(payload),
+    }
+
+    entry = {}
+    for suffix, variant in variants.items():
+        target = output_dir / f"{source_file.name}{suffix}"
+        changed = write_if_changed(target, variant)
+        info = describe(variant)
+        info["file"] = target.name
+        entry[suffix.lstrip('.') or 'identity'] = info
+
+        status = "updated" if changed else "unchanged"
+        print(f"  {target.name}: {info['size']} bytes ({status})")
+
+    return entry
+
+def main():
+    parser = argparse.ArgumentParser(description="Минифицированные и сжатые JSON плеера с манифестом для CDN")
+    parser.add_argument('--catalog', type=Path, default=CATALOG_FILE, help="файл каталога")
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR, help="папка артефактов")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print("Building static JSON artifacts...\n")
+
+    manifest = {}
+    for source_file in source_files(args.catalog):
+        if not source_file.exists():
+            print(f"WARNING: {source_file} not found, skipping")
+            continue
+
+        print(f"Processing: {source_file.name}")
+        manifest[source_file.name] = build_artifacts(source_file, output_dir)
+
+    manifest_file = output_dir / 'manifest.json'
+    manifest_payload = json.dumps(manifest, ensure_ascii=False, sort_keys=True, indent=2).encode('utf-8')
+    write_if_changed(manifest_file, manifest_payload + b'\n')
+
+    print(f"\n{'='*60}")
+    print(f"Artifacts: {len(manifest)} files")
+    for name, entry in manifest.items():
+        original = entry['identity']['size']
+        print(f"  {name}: {original} → gz {entry['gz']['size']}, xz {entry['xz']['size']} bytes")
+    print(f"Manifest: {manifest_file}")
+    print(f"{'='*60}")
+
+if __name__ == '__main__':
+    main()
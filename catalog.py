@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Каталог авторов и альбомов (catalog.json в корне проекта)
+Автор: поля плеера (имя, аватар, ссылки), формат исходных файлов песен, шаблон ссылки на страницу,
+выходные файлы; альбомы: номер, название, порядковое числительное и папки с исходниками.
+Пути в каталоге указаны относительно корня проекта
+"""
+
+import json
+from pathlib import Path
+
+BASE_DIR = Path('/home/user/VLK')
+CATALOG_FILE = BASE_DIR / 'catalog.json'
+
+def load_catalog(catalog_file=CATALOG_FILE):
+    """Список авторов каталога в порядке файла"""
+    with open(catalog_file, 'r', encoding='utf-8') as f:
+        return json.load(f)['authors']
+
+def get_author(author_id, catalog_file=CATALOG_FILE):
+    """Запись автора по id"""
+    for author in load_catalog(catalog_file):
+        if author['id'] == author_id:
+            return author
+    raise KeyError(f"Author '{author_id}' not found in {catalog_file}")
+
+def catalog_path(relative):
+    """Абсолютный путь для пути из каталога"""
+    return BASE_DIR / relative
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Компактный формат JSON для плеера (версия 3)
+Повторяющиеся строки вынесены в общую таблицу строк, а записи stihi
+ссылаются на треки альбомов по индексу вместо дублирования title/name/patch.
+Альбомы и треки хранятся строками по заголовку полей (albumFields, trackFields), поэтому
+любые поля (year, genre, duration...) переживают кодирование; запись с другим набором
+или порядком полей хранится словарем
+"""
+
+import gzip
+import json
+import time
+from pathlib import Path
+
+COMPACT_FORMAT_VERSION = 3
+LINK_BASE = "https://v-volkov.ru/"
+
+# Метки у сокращенных значений: STRIPPED - префикс (LINK_BASE, путь альбома) убран, KEPT - значение как есть
+STRIPPED = '~'
+KEPT = '='
+
+class StringTable:
+    """Таблица строк: каждая строка хранится один раз, в записях - её индекс"""
+
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def intern(self, value):
+        if value not in self.index:
+            self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return self.index[value]
+
+def strip_prefix(value, prefix):
+    """Убирает префикс с явной меткой, чтобы при восстановлении не угадывать (ссылка '/donate' остается как есть)"""
+    if not isinstance(value, str):
+        return value
+    if value.startswith(prefix):
+        return STRIPPED + value[len(prefix):]
+    return KEPT + value
+
+def restore_prefix(value, prefix):
+    if not isinstance(value, str):
+        return value
+    if value.startswith(STRIPPED):
+        return prefix + value[len(STRIPPED):]
+    return value[len(KEPT):]
+
+def record_fields(records, skip=()):
+    """Заголовок полей: ключи всех записей в порядке первого появления"""
+    fields = []
+    for record in records:
+        for key in record:
+            if key not in skip and key not in fields:
+                fields.append(key)
+    return fields
+
+def string_fields(records, fields):
+    """Поля, все значения которых - строки: они идут через таблицу строк, остальные хранятся как есть"""
+    return [field for field in fields
+            if all(isinstance(record[field], str) for record in records if field in record)]
+
+def encode_record(record, fields, strings, table, extra=None):
+    """
+    Запись -> строка значений по заголовку (плюс extra в конце, например треки альбома);
+    если набор или порядок полей отличается от заголовка - словарь
+    """
+    def encode(key, value):
+        return table.intern(value) if key in strings else value
+
+    keys = [key for key in record if key != 'tracks']
+    if keys == fields:
+        row = [encode(key, record[key]) for key in fields]
+        return row + [extra] if extra is not None else row
+    return {key: extra if key == 'tracks' else encode(key, value) for key, value in record.items()}
+
+def decode_record(row, fields, strings_table, strings):
+    """Обратное к encode_record: (словарь полей, extra или None)"""
+    def decode(key, value):
+        return strings_table[value] if key in strings else value
+
+    if isinstance(row, dict):
+        return {key: value if key == 'tracks' else decode(key, value) for key, value in row.items()}, row.get('tracks')
+    record = {key: decode(key, value) for key, value in zip(fields, row)}
+    return record, row[len(fields)] if len(row) > len(fields) else None
+
+def stripped_track(track, album_prefix):
+    """Трек с путем без префикса альбома и ссылкой без LINK_BASE"""
+    track = dict(track)
+    if 'patch' in track:
+        track['patch'] = strip_prefix(track['patch'], album_prefix)
+    if 'link' in track:
+        track['link'] = strip_prefix(track['link'], LINK_BASE)
+    return track
+
+def encode_compact(content):
+    """Преобразует content.json плеера в компактный формат"""
+    table = StringTable()
+
+    album_fields = record_fields(content['albums'], skip=('tracks',))
+    album_strings = string_fields(content['albums'], album_fields)
+    all_tracks = [stripped_track(track, f"/{album['name']}/") for album in content['albums'] for track in album['tracks']]
+    track_fields = record_fields(all_tracks)
+    track_strings = string_fields(all_tracks, track_fields)
+
+    albums = []
+    track_positions = {}
+    stripped = iter(all_tracks)
+    for album_pos, album in enumerate(content['albums']):
+        tracks = []
+        for track_pos, track in enumerate(album['tracks']):
+            tracks.append(encode_record(next(stripped), track_fields, track_strings, table))
+            track_positions.setdefault(track['patch'], (album_pos, track_pos, track))
+
+        albums.append(encode_record(album, album_fields, album_strings, table, extra=tracks))
+
+    stihi = []
+    for entry in content['stihi']:
+        lines = [table.intern(line) for line in entry['text']]
+        position = track_positions.get(entry['track']['patch'])
+
+        if position and list(entry) == ['title', 'link', 'track', 'text']:
+            album_pos, track_pos, track = position
+            # Трек стиха - трек альбома без ссылки (вместе с year, genre, duration)
+            if (entry['title'] == track['name'] and entry['link'] == track.get('link')
+                    and entry['track'] == {key: value for key, value in track.items() if key != 'link'}):
+                stihi.append([album_pos, track_pos, lines])
+                continue
+
+        # Запись не совпадает с треком альбома - сохраняем её поля явно
+        stihi.append({"record": dict(entry, text=lines)})
+
+    header = {key: value for key, value in content.items() if key not in ('albums', 'stihi')}
+
+    return {
+        "format": "compact",
+        "version": COMPACT_FORMAT_VERSION,
+        "keys": list(content.keys()),
+        "header": header,
+        "linkBase": LINK_BASE,
+        "albumFields": album_fields,
+        "albumStrings": album_strings,
+        "trackFields": track_fields,
+        "trackStrings": track_strings,
+        "strings": table.strings,
+        "albums": albums,
+        "stihi": stihi
+    }
+
+def expand_compact(compact):
+    """Восстанавливает из компактного формата content.json в текущем виде"""
+    if compact.get('format') != 'compact' or compact.get('version') != COMPACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact format: {compact.get('format')} v{compact.get('version')}")
+
+    strings = compact['strings']
+    link_base = compact['linkBase']
+
+    albums = []
+    for row in compact['albums']:
+        album, tracks = decode_record(row, compact['albumFields'], strings, compact['albumStrings'])
+        album_prefix = f"/{album['name']}/"
+        album_tracks = []
+        for track_row in tracks:
+            track, _ = decode_record(track_row, compact['trackFields'], strings, compact['trackStrings'])
+            if 'patch' in track:
+                track['patch'] = restore_prefix(track['patch'], album_prefix)
+            if 'link' in track:
+                track['link'] = restore_prefix(track['link'], link_base)
+            album_tracks.append(track)
+        album['tracks'] = album_tracks
+        albums.append(album)
+
+    stihi = []
+    for entry in compact['stihi']:
+        if isinstance(entry, dict):
+            record = dict(entry['record'])
+            record['text'] = [strings[line_idx] for line_idx in record['text']]
+            stihi.append(record)
+            continue
+
+        album_pos, track_pos, lines = entry
+        track = albums[album_pos]['tracks'][track_pos]
+        stihi.append({
+            "title": track['name'],
+            "link": track['link'],
+            "track": {key: value for key, value in track.items() if key != 'link'},
+            "text": [strings[line_idx] for line_idx in lines]
+        })
+
+    content = {}
+    for key in compact['keys']:
+        if key == 'albums':
+            content[key] = albums
+        elif key == 'stihi':
+            content[key] = stihi
+        else:
+            content[key] = compact['header'][key]
+    return content
+
+def load_player_content(path):
+    """Загружает content.json плеера в любом из форматов"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') == 'compact':
+        return expand_compact(data)
+    return data
+
+def _best_time(func, repeat=20):
+    """Минимальное время выполнения функции в миллисекундах"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+def main():
+    source_file = Path('/home/user/VLK/VOLKOV2.0/content.json')
+    output_file = Path('/home/user/VLK/VOLKOV2.0/content.compact.json')
+
+    print("Creating compact player JSON...\n")
+
+    with open(source_file, 'r', encoding='utf-8') as f:
+        original_text = f.read()
+    content = json.loads(original_text)
+
+    compact = encode_compact(content)
+    if expand_compact(compact) != content:
+        raise RuntimeError("Compact format round-trip mismatch")
+
+    compact_text = json.dumps(compact, ensure_ascii=False, separators=(',', ':'))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(compact_text)
+
+    minified_text = json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+
+    variants = [
+        ("content.json (indent=2)", original_text),
+        ("content.json (minified)", minified_text),
+        ("content.compact.json", compact_text),
+    ]
+
+    print(f"{'='*60}")
+    print(f"✓ Created {output_file}")
+    print(f"  Strings in table: {len(compact['strings'])}")
+    print(f"{'='*60}")
+
+    print(f"\nSizes (raw / gzip -9):")
+    for label, text in variants:
+        payload = text.encode('utf-8')
+        print(f"  {label:26} {len(payload):>8} / {len(gzip.compress(payload, 9)):>7} bytes")
+
+    print(f"\nParse time (best of 20):")
+    print(f"  {'content.json (indent=2)':26} {_best_time(lambda: json.loads(original_text)):8.2f} ms")
+    print(f"  {'content.json (minified)':26} {_best_time(lambda: json.loads(minified_text)):8.2f} ms")
+    print(f"  {'compact, parse only':26} {_best_time(lambda: json.loads(compact_text)):8.2f} ms")
+    print(f"  {'compact, parse + expand':26} {_best_time(lambda: expand_compact(json.loads(compact_text))):8.2f} ms")
+
+if __name__ == '__main__':
+    main()
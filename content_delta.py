@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Версии content.json и дельта-обновления в формате JSON Patch (RFC 6902)
+Хранит последнюю опубликованную версию и цепочку патчей между версиями,
+чтобы клиент с версией N скачивал только изменения
+"""
+
+import difflib
+import hashlib
+import json
+from pathlib import Path
+
+def _pointer(path, key):
+    """Добавляет сегмент к JSON Pointer с экранированием ~ и /"""
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+def _fingerprint(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+def _diff_lists(old, new, path, ops):
+    """Разница списков через выравнивание элементов (вставка в середину - одна операция add)"""
+    matcher = difflib.SequenceMatcher(None, [_fingerprint(v) for v in old], [_fingerprint(v) for v in new],
+                                      autojunk=False)
+    offset = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+
+        if tag == 'replace' and i2 - i1 == j2 - j1:
+            # Элементы изменились на месте - спускаемся внутрь
+            for k in range(i2 - i1):
+                _diff(old[i1 + k], new[j1 + k], _pointer(path, i1 + k + offset), ops)
+            continue
+
+        for _ in range(i1, i2):
+            ops.append({"op": "remove", "path": _pointer(path, i1 + offset)})
+        for k in range(j1, j2):
+            ops.append({"op": "add", "path": _pointer(path, i1 + offset + k - j1), "value": new[k]})
+        offset += (j2 - j1) - (i2 - i1)
+
+def _diff(old, new, path, ops):
+    if type(old) is not type(new):
+        ops.append({"op": "replace", "path": path, "value": new})
+    elif isinstance(old, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                _diff(old[key], value, _pointer(path, key), ops)
+    elif isinstance(old, list):
+        _diff_lists(old, new, path, ops)
+    elif old != new:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+def make_json_patch(old, new):
+    """Строит JSON Patch (RFC 6902), превращающий old в new"""
+    ops = []
+    _diff(old, new, '', ops)
+    return ops
+
+def _resolve(doc, path):
+    """Возвращает (родительский контейнер, ключ) для JSON Pointer"""
+    segments = [s.replace('~1', '/').replace('~0', '~') for s in path.split('/')[1:]]
+    parent = doc
+    for segment in segments[:-1]:
+        parent = parent[int(segment)] if isinstance(parent, list) else parent[segment]
+    key = segments[-1]
+    if isinstance(parent, list):
+        key = len(parent) if key == '-' else int(key)
+    return parent, key
+
+def apply_json_patch(doc, patch):
+    """Применяет JSON Patch (операции add, remove, replace) к копии документа"""
+    doc = json.loads(json.dumps(doc))
+    for op in patch:
+        if op['path'] == '':
+            if op['op'] in ('add', 'replace'):
+                doc = json.loads(json.dumps(op['value']))
+                continue
+            raise ValueError(f"Unsupported root operation: {op['op']}")
+
+        parent, key = _resolve(doc, op['path'])
+        if op['op'] == 'add':
+            if isinstance(parent, list):
+                parent.insert(key, op['value'])
+            else:
+                parent[key] = op['value']
+        elif op['op'] == 'remove':
+            del parent[key]
+        elif op['op'] == 'replace':
+            parent[key] = op['value']
+        else:
+            raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return doc
+
+def _sha256(data):
+    return hashlib.sha256(_fingerprint(data).encode('utf-8')).hexdigest()
+
+def publish_version(content_file, versions_dir):
+    """
+    Сравнивает content.json с последней опубликованной версией.
+    При изменениях увеличивает номер версии, записывает патч patches/<N-1>-<N>.json
+    и обновляет published.json и versions.json. Возвращает запись versions.json
+    """
+    versions_dir = Path(versions_dir)
+    patches_dir = versions_dir / 'patches'
+    patches_dir.mkdir(parents=True, exist_ok=True)
+
+    versions_file = versions_dir / 'versions.json'
+    published_file = versions_dir / 'published.json'
+
+    with open(content_file, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+
+    if versions_file.exists() and published_file.exists():
+        with open(versions_file, 'r', encoding='utf-8') as f:
+            versions = json.load(f)
+        with open(published_file, 'r', encoding='utf-8') as f:
+            published = json.load(f)
+    else:
+        versions = {"version": 0, "sha256": None, "patches": []}
+        published = None
+
+    sha256 = _sha256(content)
+    if sha256 == versions['sha256']:
+        return versions
+
+    new_version = versions['version'] + 1
+
+    if published is not None:
+        patch = make_json_patch(published, content)
+        if apply_json_patch(published, patch) != content:
+            raise RuntimeError("JSON Patch does not reproduce the new content")
+
+        patch_name = f"{versions['version']}-{new_version}.json"
+        with open(patches_dir / patch_name, 'w', encoding='utf-8') as f:
+            json.dump({"from": versions['version'], "to": new_version, "patch": patch},
+                      f, ensure_ascii=False, separators=(',', ':'))
+
+        versions['patches'].append({
+            "from": versions['version'],
+            "to": new_version,
+            "file": f"patches/{patch_name}",
+            "operations": len(patch),
+            "size": (patches_dir / patch_name).stat().st_size
+        })
+
+    versions['version'] = new_version
+    versions['sha256'] = sha256
+
+    with open(published_file, 'w', encoding='utf-8') as f:
+        json.dump(content, f, ensure_ascii=False, indent=2)
+    with open(versions_file, 'w', encoding='utf-8') as f:
+        json.dump(versions, f, ensure_ascii=False, indent=2)
+
+    return versions
+
+def main():
+    content_file = Path('/home/user/VLK/VOLKOV2.0/content.json')
+    versions_dir = Path('/home/user/VLK/VOLKOV2.0/versions')
+
+    versions = publish_version(content_file, versions_dir)
+
+    print(f"{'='*60}")
+    print(f"Published version: {versions['version']}")
+    if versions['patches']:
+        last = versions['patches'][-1]
+        print(f"Last patch: {last['file']} ({last['operations']} operations, {last['size']} bytes)")
+    print(f"{'='*60}")
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,8 @@ import json
 from pathlib import Path
 from transliterate import translit
 
+from catalog import catalog_path, get_author
+
 def transliterate_title(title):
     """Транслитерация названия для URL"""
     try:
@@ -58,23 +60,15 @@ def convert_volkov_to_player_format(base_url="https://v-volkov.ru"):
     """
     Конвертирует файлы VOLKOV2.0 в формат для плеера
     """
-    volkov_dir = Path('/home/user/VLK/VOLKOV2.0')
-
-    # Названия альбомов
-    album_names = {
-        1: "Моя песня – на светлую чашу весов",
-        2: "В той области небес",
-        3: "Горит свеча",
-        4: "Наша жизнь – слишком тонкая нить",
-        5: "Не испачкавшись во лжи"
-    }
+    author = get_author('volkov')
 
     all_tracks = []
 
-    # Обрабатываем каждый альбом
-    for cd_num in range(1, 6):
-        cd_dir = volkov_dir / f"CD{cd_num}"
-        album_name = album_names[cd_num]
+    # Обрабатываем каждый альбом каталога
+    for album in author['albums']:
+        cd_num = album['number']
+        cd_dir = catalog_path(album['dir'])
+        album_name = album['name']
 
         if not cd_dir.exists():
             print(f"WARNING: Directory {cd_dir} not found")
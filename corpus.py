@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Загрузка корпуса стихотворений из всех источников проекта
+Альбомы (STIHI_VOLKOV), раннее творчество (TEXT_EXTRACTED) и STAH_JSON
+приводятся к общей структуре: id, source, title, text
+"""
+
+import json
+from pathlib import Path
+
+from stah_texts import STAH_DIR, load_stah_texts
+from verified_texts import TEXT_DIR, load_verified_texts, match_verified, read_titled_text
+
+BASE_DIR = Path('/home/user/VLK')
+ALBUMS_DIR = BASE_DIR / 'STIHI_VOLKOV'
+EXTRACTED_DIR = BASE_DIR / 'TEXT_EXTRACTED'
+
+ALL_SOURCES = ('album', 'extracted', 'stah')
+
+def iter_album_poems(albums_dir=ALBUMS_DIR):
+    """Стихотворения альбомов из JSON файлов STIHI_VOLKOV/CD*/"""
+    for cd_dir in sorted(albums_dir.glob('CD*')):
+        for json_file in sorted(cd_dir.glob('*.json')):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            yield {
+                'id': f"{cd_dir.name.lower()}/{json_file.stem}",
+                'source': 'album',
+                'title': data['title'],
+                'text': data['text']
+            }
+
+def iter_extracted_poems(extracted_dir=EXTRACTED_DIR, text_dir=TEXT_DIR):
+    """
+    Ранние песни, извлеченные из .doc/.docx в TEXT_EXTRACTED.
+    Если для песни есть верифицированный текст (TEXT/*.mp3.json), берется он;
+    каждый верифицированный текст попадает в корпус один раз
+    """
+    verified_texts = load_verified_texts(text_dir)
+    used = set()
+
+    for txt_file in sorted(extracted_dir.glob('*.txt')):
+        title, text = read_titled_text(txt_file)
+        if not text:
+            continue
+
+        verified = match_verified(title, verified_texts)
+        if verified:
+            if verified['source_file'] in used:
+                continue
+            used.add(verified['source_file'])
+            title, text = verified['title'], verified['text']
+
+        yield {
+            'id': f"early/{txt_file.stem}",
+            'source': 'extracted',
+            'title': title,
+            'text': text,
+            'verified': verified is not None
+        }
+
+    for verified in verified_texts:
+        if verified['source_file'] not in used:
+            yield {
+                'id': f"early/verified/{verified['title']}",
+                'source': 'extracted',
+                'title': verified['title'],
+                'text': verified['text'],
+                'verified': True
+            }
+
+def iter_stah_poems(stah_dir=STAH_DIR):
+    """Песни из V-VOLKOV/STAH_JSON (см. stah_texts.py); id - номер файла, у файлов без номера - имя файла"""
+    for song in load_stah_texts(stah_dir):
+        key = f"{song['number']:02d}" if song['number'] is not None else Path(song['file']).stem
+        yield {
+            'id': f"stah/{key}",
+            'source': 'stah',
+            'title': song['title'],
+            'text': song['text']
+        }
+
+SOURCE_LOADERS = {
+    'album': iter_album_poems,
+    'extracted': iter_extracted_poems,
+    'stah': iter_stah_poems,
+}
+
+def load_corpus(sources=ALL_SOURCES):
+    """Загружает стихотворения из указанных источников в одном списке"""
+    poems = []
+    for source in sources:
+        poems.extend(SOURCE_LOADERS[source]())
+    return poems
+
+if __name__ == '__main__':
+    corpus = load_corpus()
+    print(f"Loaded {len(corpus)} poems")
+    for source in ALL_SOURCES:
+        count = sum(1 for poem in corpus if poem['source'] == source)
+        lines = sum(len(poem['text']) for poem in corpus if poem['source'] == source)
+        print(f"  {source:10} {count:5} poems, {lines:6} lines")
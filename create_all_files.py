@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import re
 import json
 import os
 from pathlib import Path
 
+import profiling
+
+SSILKI_ROOT = Path('/home/user/VLK/V-VOLKOV')
+STIHI_DIR = Path('/home/user/VLK/STIHI_VOLKOV')
+
 def transliterate_title(title):
     """Transliterate Russian title to Latin for URL"""
     translit_map = {
@@ -33,9 +39,9 @@ def transliterate_title(title):
     return transliterated
 
 
-def get_audio_link(album, track, title):
+def get_audio_link(album, track, title, ssilki_root=SSILKI_ROOT):
     """Generate audio link for poem"""
-    ssilki_path = f'/home/user/VLK/V-VOLKOV/CD {album}/ssilki0{album}.txt'
+    ssilki_path = ssilki_root / f'CD {album}' / f'ssilki0{album}.txt'
 
     if os.path.exists(ssilki_path):
         with open(ssilki_path, 'r', encoding='utf-8') as f:
@@ -49,12 +55,13 @@ def get_audio_link(album, track, title):
     return f"https://v-volkov.ru/audio/cd{album}/{album}{track:02d}_vlk_{translit}.mp3"
 
 
+@profiling.profiled('parse_html')
 def parse_html_with_stanzas(html_content):
     """Parse HTML and properly detect stanzas"""
     poems = []
 
     # Find all anchors
-    anchor_pattern = r'name="(D(\d)_(\d+))"'
+    anchor_pattern = r'name="(D(\d+)_(\d+))"'
     anchors = list(re.finditer(anchor_pattern, html_content))
 
     print(f"Found {len(anchors)} anchor matches")
@@ -207,72 +214,91 @@ def parse_html_with_stanzas(html_content):
                 'text': cleaned_lines
             })
 
+    profiling.count('poems_parsed', len(poems))
     return poems
 
 
-def create_txt_and_json_files(poems):
-    """Create both .txt and .json files for all poems"""
-    base_dir = Path('/home/user/VLK/STIHI_VOLKOV')
+def write_poem_files(poem, base_dir=STIHI_DIR, ssilki_root=SSILKI_ROOT):
+    """Create .txt and .json files for one poem"""
+    album = poem['album']
+    track = poem['track']
+    title = poem['title']
+    text = poem['text']
 
-    for poem in poems:
-        album = poem['album']
-        track = poem['track']
-        title = poem['title']
-        text = poem['text']
+    # Get audio link
+    audio_link = get_audio_link(album, track, title, ssilki_root)
+
+    # Create JSON object
+    json_obj = {
+        'title': title,
+        'link': audio_link,
+        'text': text
+    }
 
-        # Get audio link
-        audio_link = get_audio_link(album, track, title)
+    # Create filenames
+    translit = transliterate_title(title)
+    if not translit:
+        translit = f"track{track}"
+
+    json_filename = f"{track:02d}_{translit}.json"
+    txt_filename = f"{album:02d}_{track}_{title}.txt"
+
+    # Output directory
+    output_dir = base_dir / f"CD{album}"
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Create JSON object
-        json_obj = {
-            'title': title,
-            'link': audio_link,
-            'text': text
-        }
+    # Write JSON file
+    json_path = output_dir / json_filename
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(json_obj, f, ensure_ascii=False, indent=2)
 
-        # Create filenames
-        translit = transliterate_title(title)
-        if not translit:
-            translit = f"track{track}"
+    # Write TXT file (text + JSON at the end)
+    txt_path = output_dir / txt_filename
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        # Write title
+        f.write(f"{title}\n\n")
 
-        json_filename = f"{track:02d}_{translit}.json"
-        txt_filename = f"{album:02d}_{track}_{title}.txt"
+        # Write text with proper line breaks
+        for line in text:
+            f.write(f"{line}\n")
 
-        # Output directory
-        output_dir = base_dir / f"CD{album}"
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # Add separator
+        f.write("\n\n")
 
-        # Write JSON file
-        json_path = output_dir / json_filename
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_obj, f, ensure_ascii=False, indent=2)
+        # Write JSON
+        f.write(json.dumps(json_obj, ensure_ascii=False, indent=2))
+        f.write("\n\n")
 
-        # Write TXT file (text + JSON at the end)
-        txt_path = output_dir / txt_filename
-        with open(txt_path, 'w', encoding='utf-8') as f:
-            # Write title
-            f.write(f"{title}\n\n")
+    if profiling.enabled():
+        profiling.count('files_written', 2)
+        profiling.count('bytes_written', json_path.stat().st_size + txt_path.stat().st_size)
 
-            # Write text with proper line breaks
-            for line in text:
-                f.write(f"{line}\n")
+    print(f"Created: CD{album}/{txt_filename}")
 
-            # Add separator
-            f.write("\n\n")
 
-            # Write JSON
-            f.write(json.dumps(json_obj, ensure_ascii=False, indent=2))
-            f.write("\n\n")
+@profiling.profiled('write_files')
+def create_txt_and_json_files(poems, base_dir=STIHI_DIR, ssilki_root=SSILKI_ROOT):
+    """Create both .txt and .json files for all poems"""
 
-        print(f"Created: CD{album}/{txt_filename}")
+    for poem in poems:
+        with profiling.item('write_poem', album=poem['album'], track=poem['track']):
+            write_poem_files(poem, base_dir, ssilki_root)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Create STIHI_VOLKOV .txt and .json files from the songs HTML")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args, 'create_all_files')
+
     html_path = '/home/user/VLK/V-VOLKOV/#U0412#U043b#U0430#U0434#U0438#U043c#U0438#U0440 #U0412#U043e#U043b#U043a#U043e#U0432 #U2013 #U0422#U0435#U043a#U0441#U0442#U044b #U043f#U0435#U0441#U0435#U043d.html'
 
     print("Reading HTML file...")
-    with open(html_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    with profiling.stage('read_html'):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+    profiling.count('files_read')
+    profiling.count('bytes_read', os.path.getsize(html_path))
 
     print("Parsing poems with proper stanza detection...")
     poems = parse_html_with_stanzas(html_content)
@@ -282,6 +308,7 @@ def main():
     create_txt_and_json_files(poems)
 
     print(f"\nDone! Created {len(poems)} files.")
+    profiling.finish()
 
 
 if __name__ == '__main__':
@@ -4,6 +4,8 @@
 import re
 from pathlib import Path
 
+from catalog import catalog_path, get_author
+
 def parse_ssilki_file(filepath):
     """Parse ssilki file and extract clean track data"""
     tracks = []
@@ -27,33 +29,20 @@ def parse_ssilki_file(filepath):
     return sorted(tracks, key=lambda x: x['num'])
 
 def main():
-    album_names = {
-        1: "Моя песня – на светлую чашу весов",
-        2: "В той области небес",
-        3: "Горит свеча",
-        4: "Наша жизнь – слишком тонкая нить",
-        5: "Не испачкавшись во лжи"
-    }
-
-    album_ordinals = {
-        1: "первого",
-        2: "второго",
-        3: "третьего",
-        4: "четвертого",
-        5: "пятого"
-    }
+    albums = get_author('volkov')['albums']
 
     ssilki_dir = Path('/home/user/VLK/VOLKOV2.0_temp')
-    output_dir = Path('/home/user/VLK/VOLKOV2.0')
 
-    for i in range(1, 6):
+    for album in albums:
+        i = album['number']
         ssilki_file = ssilki_dir / f'ssilki0{i}.txt'
         tracks = parse_ssilki_file(ssilki_file)
 
+        output_dir = catalog_path(album['dir']).parent
         output_file = output_dir / f'ssilki0{i}.txt'
 
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"Ссылки на аудиофайлы {album_ordinals[i]} альбома «{album_names[i]}»\n\n")
+            f.write(f"Ссылки на аудиофайлы {album['ordinal']} альбома «{album['name']}»\n\n")
 
             for track in tracks:
                 f.write(f"{track['num']:02d}. {track['title']} — {track['url']}\n")
@@ -6,9 +6,21 @@
 По аналогии с форматом content.json для Станислава Андрейчика
 """
 
+import argparse
+import contextlib
+import hashlib
 import json
+import os
 from pathlib import Path
 
+import profiling
+from catalog import catalog_path, get_author
+from content_delta import publish_version
+from mp3_scanner import load_mp3_info
+from mp3tag_html import load_track_metadata, lookup_track
+from stah_texts import load_stah_texts
+from verified_texts import read_titled_text
+
 def transliterate_simple(text):
     """Простая транслитерация для URL"""
     result = text.lower()
@@ -28,149 +40,369 @@ def transliterate_simple(text):
         result = result.replace('__', '_')
     return result.strip('_')
 
-def create_player_json():
-    """Создает полный JSON для плеера"""
-
-    volkov_dir = Path('/home/user/VLK/VOLKOV2.0')
-
-    # Информация об альбомах
-    albums_info = {
-        1: {"name": "Моя песня – на светлую чашу весов", "year": ""},
-        2: {"name": "В той области небес", "year": ""},
-        3: {"name": "Горит свеча", "year": ""},
-        4: {"name": "Наша жизнь – слишком тонкая нить", "year": ""},
-        5: {"name": "Не испачкавшись во лжи", "year": ""}
-    }
-
-    # Корневая структура JSON
-    content = {
-        "authorName": "Владимир Волков",
-        "avatar": "volkov-avatar.jpg",
-        "bio": [],
-        "bioAvatar": "img/volkov-bio.jpg",
-        "albums": [],
-        "stihi": [],
-        "donationText": "Поддержите проект памяти Владимира Волкова",
-        "donationLinks": [
-            {"title": "Сайт", "link": "https://v-volkov.ru"},
-            {"title": "Скачать альбомы", "link": "https://v-volkov.ru/audio/"},
-            {"title": "О проекте", "link": "https://v-volkov.ru/about"}
-        ],
-        "socialLinks": [
-            {"title": "VK", "link": "https://vk.com/v_volkov"},
-            {"title": "YouTube", "link": "https://youtube.com/@vladimirvolk"},
-        ]
+# Автор по умолчанию; альбомы, поля плеера и пути - в catalog.json
+VOLKOV = get_author('volkov')
+
+def content_fields(albums, stihi, author=VOLKOV):
+    """Корневая структура JSON в порядке ключей плеера"""
+    return {
+        "authorName": author['authorName'],
+        "avatar": author['avatar'],
+        "bio": author['bio'],
+        "bioAvatar": author['bioAvatar'],
+        "albums": albums,
+        "stihi": stihi,
+        "donationText": author['donationText'],
+        "donationLinks": author['donationLinks'],
+        "socialLinks": author['socialLinks']
     }
 
-    # Создаем массив альбомов
-    for cd_num in range(1, 6):
-        cd_dir = volkov_dir / f"CD{cd_num}"
-        album_name = albums_info[cd_num]['name']
-
-        if not cd_dir.exists():
-            continue
-
-        json_files = sorted(cd_dir.glob("*.json"))
-
-        # Создаем треки для альбома
+def iter_catalog_albums(author=VOLKOV):
+    """Перебирает альбомы автора с существующими папками: (запись альбома, папка)"""
+    for album in author['albums']:
+        cd_dir = catalog_path(album['dir'])
+        if cd_dir.exists():
+            yield album, cd_dir
+
+def iter_album_dirs(author=VOLKOV):
+    """Перебирает существующие папки альбомов: (номер CD, название альбома, папка)"""
+    for album, cd_dir in iter_catalog_albums(author):
+        yield album['number'], album['name'], cd_dir
+
+def iter_song_files(cd_dir, song_format='song_json'):
+    """
+    Перебирает файлы песен альбома: (файл, данные с title/text/link).
+    song_json - JSON файлы песен, titled_text - текстовые файлы 'Название, пустая строка, текст',
+    stah_text - файлы STAH_JSON (ссылка на страницу песни берется из записи в файле)
+    """
+    if song_format == 'stah_text':
+        for song in load_stah_texts(cd_dir):
+            yield cd_dir / song['source_file'], {"title": song['title'], "text": song['text'], "page": song['link']}
+        return
+
+    if song_format == 'titled_text':
+        for txt_file in sorted(cd_dir.glob("*.txt")):
+            title, text = read_titled_text(txt_file)
+            if text:
+                yield txt_file, {"title": title, "text": text}
+        return
+
+    for json_file in sorted(cd_dir.glob("*.json")):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield json_file, data
+
+def track_fields(cd_num, album_name, json_file, data, author=VOLKOV):
+    """Возвращает название, путь к MP3 в плеере и ссылку на страницу песни"""
+    title = data['title']
+    link = data.get('link', '')
+
+    # Извлекаем название MP3 файла
+    if author['mp3Name'] == 'title':
+        mp3_filename = f"{title}.mp3"
+    elif link:
+        mp3_filename = link.split('/')[-1]
+    else:
+        track_num = int(json_file.name.split('_')[0])
+        mp3_filename = f"{cd_num}0{track_num}_vlk_{json_file.stem}.mp3"
+
+    # URL для страницы песни
+    url_title = transliterate_simple(title)
+
+    page_link = data.get('page') or author['pageLink'].format(slug=url_title)
+
+    return title, f"/{album_name}/{mp3_filename}", page_link
+
+def add_duration(track, patch, mp3_info):
+    """
+    Добавляет длительность в секундах, если MP3 трека был просканирован (mp3_scanner.py) и в нем нашлись кадры.
+    Ключ - patch без ведущего '/': файл '<mp3Dir>/<название альбома>/<файл>.mp3' локальной копии альбомов
+    """
+    info = mp3_info.get(patch.lstrip('/'))
+    if info and info.get('duration'):
+        track["duration"] = info['duration']
+    return track
+
+def load_author_metadata(author=VOLKOV):
+    """Теги Mp3tag и ссылки на страницы песен автора (mp3tag_html.py), если папка выгрузок указана в каталоге"""
+    if not author.get('mp3tagDir'):
+        return {}
+    return load_track_metadata(catalog_path(author['mp3tagDir']))
+
+def add_tags(track, tags):
+    """Добавляет год и жанр из тегов Mp3tag"""
+    if tags.get('year'):
+        track["year"] = tags['year']
+    if tags.get('genre'):
+        track["genre"] = tags['genre']
+    return track
+
+def iter_albums(author=VOLKOV, mp3_info=None, metadata=None):
+    """Генерирует альбомы плеера по одному"""
+    if mp3_info is None:
+        mp3_info = load_mp3_info()
+    if metadata is None:
+        metadata = load_author_metadata(author)
+
+    for album, cd_dir in iter_catalog_albums(author):
         tracks = []
-        for json_file in json_files:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            title = data['title']
-            link = data.get('link', '')
-
-            # Извлекаем название MP3 файла
-            if link:
-                mp3_filename = link.split('/')[-1]
-            else:
-                track_num = int(json_file.name.split('_')[0])
-                mp3_filename = f"{cd_num}0{track_num}_vlk_{json_file.stem}.mp3"
-
-            # URL для страницы песни
-            url_title = transliterate_simple(title)
-
-            tracks.append({
-                "name": title,
-                "patch": f"/{album_name}/{mp3_filename}",
-                "link": f"https://v-volkov.ru/{url_title}"
-            })
-
-        # Добавляем альбом
-        content["albums"].append({
-            "name": album_name,
-            "avatar": f"img/album{cd_num}.jpg",
-            "tracks": tracks
+        years = []
+        with profiling.item('album', number=album['number']):
+            for json_file, data in iter_song_files(cd_dir, author['songFormat']):
+                title, patch, page_link = track_fields(album['number'], album['name'], json_file, data, author)
+                tags = lookup_track(metadata, album['name'], title)
+                if tags.get('year'):
+                    years.append(tags['year'])
+                tracks.append(add_duration(add_tags({
+                    "name": title,
+                    "patch": patch,
+                    "link": tags.get('link') or page_link
+                }, tags), patch, mp3_info))
+        profiling.count('tracks', len(tracks))
+
+        entry = {"name": album['name']}
+        # Год альбома из каталога, иначе самый частый год треков
+        year = album['year'] or (max(set(years), key=years.count) if years else None)
+        if year:
+            entry["year"] = year
+        entry["avatar"] = album['avatar']
+        entry["tracks"] = tracks
+        yield entry
+
+def iter_stihi(author=VOLKOV, mp3_info=None, metadata=None):
+    """Генерирует записи массива стихов/песен по одной"""
+    if mp3_info is None:
+        mp3_info = load_mp3_info()
+    if metadata is None:
+        metadata = load_author_metadata(author)
+
+    for cd_num, album_name, cd_dir in iter_album_dirs(author):
+        for json_file, data in iter_song_files(cd_dir, author['songFormat']):
+            title, patch, page_link = track_fields(cd_num, album_name, json_file, data, author)
+            tags = lookup_track(metadata, album_name, title)
+            yield {
+                "title": title,
+                "link": tags.get('link') or page_link,
+                "track": add_duration(add_tags({
+                    "name": title,
+                    "patch": patch
+                }, tags), patch, mp3_info),
+                "text": data['text']
+            }
+
+def load_sources(author=VOLKOV):
+    """Длительности MP3 и теги Mp3tag - общие источники для альбомов и стихов"""
+    with profiling.stage('load_mp3_info'):
+        mp3_info = load_mp3_info()
+    with profiling.stage('load_metadata'):
+        metadata = load_author_metadata(author)
+    return mp3_info, metadata
+
+@profiling.profiled('player_json')
+def create_player_json(author=VOLKOV):
+    """Создает полный JSON для плеера"""
+    mp3_info, metadata = load_sources(author)
+    return content_fields(list(iter_albums(author, mp3_info, metadata)),
+                          list(iter_stihi(author, mp3_info, metadata)), author)
+
+class JSONStreamWriter:
+    """
+    Потоковая запись JSON-объекта верхнего уровня в несколько файлов.
+    Значения-итераторы записываются как массивы по одному элементу,
+    каждый элемент сериализуется один раз и дублируется во все файлы.
+    Результат совпадает с json.dump(..., ensure_ascii=False, indent=2).
+    """
+
+    def __init__(self, sinks, indent=2):
+        self.sinks = sinks
+        self.indent = indent
+        self.bytes_written = 0
+
+    def _emit(self, text):
+        chunk = text.encode('utf-8')
+        for sink in self.sinks:
+            sink.write(chunk)
+        self.bytes_written += len(chunk)
+
+    def _dumps(self, value, level):
+        text = json.dumps(value, ensure_ascii=False, indent=self.indent)
+        return text.replace('\n', '\n' + ' ' * (self.indent * level))
+
+    def write_object(self, fields):
+        pad = ' ' * self.indent
+        self._emit('{')
+        for i, (key, value) in enumerate(fields.items()):
+            self._emit(f"{',' if i else ''}\n{pad}{json.dumps(key, ensure_ascii=False)}: ")
+            if isinstance(value, (dict, list, str, int, float, bool, type(None))):
+                self._emit(self._dumps(value, 1))
+                continue
+
+            # Итератор - пишем массив поэлементно
+            count = 0
+            self._emit('[')
+            for item in value:
+                self._emit(f"{',' if count else ''}\n{pad * 2}{self._dumps(item, 2)}")
+                count += 1
+            self._emit(f"\n{pad}]" if count else ']')
+        self._emit('\n}' if fields else '}')
+
+@profiling.profiled('player_json')
+def write_player_json(output_files, author=VOLKOV):
+    """
+    Потоково пишет JSON плеера во все файлы, возвращает статистику альбомов.
+    Запись идет во временные файлы рядом с выходными, которые подменяются только после успешной
+    сборки: ошибка в данных песен или каталога не оставляет опубликованный content.json обрезанным
+    """
+    album_stats = []
+    mp3_info, metadata = load_sources(author)
+
+    def counted_albums():
+        for album in iter_albums(author, mp3_info, metadata):
+            album_stats.append((album['name'], len(album['tracks'])))
+            yield album
+
+    output_files = [Path(output_file) for output_file in output_files]
+    temp_files = [output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp") for output_file in output_files]
+    try:
+        with contextlib.ExitStack() as stack:
+            sinks = [stack.enter_context(open(temp_file, 'wb')) for temp_file in temp_files]
+            writer = JSONStreamWriter(sinks)
+            writer.write_object(content_fields(counted_albums(), iter_stihi(author, mp3_info, metadata), author))
+    except BaseException:
+        for temp_file in temp_files:
+            temp_file.unlink(missing_ok=True)
+        raise
+
+    for temp_file, output_file in zip(temp_files, output_files):
+        os.replace(temp_file, output_file)
+    profiling.count('files_written', len(output_files))
+    profiling.count('bytes_written', writer.bytes_written * len(output_files))
+
+    return album_stats
+
+def _dump_compact(data):
+    """Компактная сериализация JSON для шардов"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _write_shard(shard_dir, data):
+    """Записывает шард под именем из хеша содержимого, возвращает имя файла"""
+    payload = _dump_compact(data)
+    shard_name = f"{hashlib.sha256(payload).hexdigest()[:16]}.json"
+    shard_path = shard_dir / shard_name
+    if not shard_path.exists():
+        with open(shard_path, 'wb') as f:
+            f.write(payload)
+    return shard_name
+
+def _replace_file(path, payload):
+    """Атомарная запись: временный файл рядом с path подменяет его через os.replace"""
+    temp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(payload)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
+    os.replace(temp_file, path)
+
+def _manifest_shards(manifest_file):
+    """Пути шардов, на которые ссылается сохраненный манифест"""
+    if not manifest_file.exists():
+        return set()
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return {manifest_file.parent / album[key] for album in manifest.get('albums', [])
+            for key in ('shard', 'textShard') if key in album}
+
+def write_sharded_content(content, output_dir):
+    """
+    Записывает контент плеера в виде манифеста и шардов:
+    manifest.json - информация об авторе, список альбомов и названия треков,
+    albums/<hash>.json - полный альбом, texts/<hash>.json - тексты песен альбома.
+    Сначала пишутся шарды, затем атомарно манифест; предыдущий манифест сохраняется
+    как manifest.previous.json, и его шарды удаляются только через поколение - клиент
+    со старым манифестом не получает 404, а сбой не оставляет манифест без шардов
+    """
+    output_dir = Path(output_dir)
+    albums_dir = output_dir / 'albums'
+    texts_dir = output_dir / 'texts'
+    albums_dir.mkdir(parents=True, exist_ok=True)
+    texts_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {key: value for key, value in content.items() if key not in ('albums', 'stihi')}
+    manifest['albums'] = []
+
+    for album in content['albums']:
+        patches = {track['patch'] for track in album['tracks']}
+        texts = [entry for entry in content['stihi'] if entry['track']['patch'] in patches]
+
+        album_shard = _write_shard(albums_dir, album)
+        text_shard = _write_shard(texts_dir, texts)
+
+        manifest['albums'].append({
+            "name": album['name'],
+            "avatar": album['avatar'],
+            "tracks": [track['name'] for track in album['tracks']],
+            "shard": f"albums/{album_shard}",
+            "textShard": f"texts/{text_shard}"
         })
 
-    # Создаем массив всех стихов/песен
-    for cd_num in range(1, 6):
-        cd_dir = volkov_dir / f"CD{cd_num}"
-        album_name = albums_info[cd_num]['name']
-
-        if not cd_dir.exists():
-            continue
-
-        json_files = sorted(cd_dir.glob("*.json"))
-
-        for json_file in json_files:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            title = data['title']
-            link = data.get('link', '')
-            text = data['text']
-
-            # Извлекаем название MP3 файла
-            if link:
-                mp3_filename = link.split('/')[-1]
-            else:
-                track_num = int(json_file.name.split('_')[0])
-                mp3_filename = f"{cd_num}0{track_num}_vlk_{json_file.stem}.mp3"
+    manifest_file = output_dir / 'manifest.json'
+    previous_file = output_dir / 'manifest.previous.json'
+    payload = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+    if manifest_file.exists():
+        current = manifest_file.read_bytes()
+        if current != payload:
+            _replace_file(previous_file, current)
+    _replace_file(manifest_file, payload)
 
-            # URL для страницы песни
-            url_title = transliterate_simple(title)
+    # Удаляем шарды, на которые не ссылаются ни новый, ни предыдущий манифест
+    retained = _manifest_shards(manifest_file) | _manifest_shards(previous_file)
+    for shard_dir in (albums_dir, texts_dir):
+        for old_shard in shard_dir.glob('*.json'):
+            if old_shard not in retained:
+                old_shard.unlink()
 
-            # Добавляем в массив стихов
-            content["stihi"].append({
-                "title": title,
-                "link": f"https://v-volkov.ru/{url_title}",
-                "track": {
-                    "name": title,
-                    "patch": f"/{album_name}/{mp3_filename}"
-                },
-                "text": text
-            })
-
-    return content
+    return manifest_file
 
 def main():
-    print("Creating Volkov music player JSON...\n")
-
-    # Создаем JSON
-    content = create_player_json()
+    parser = argparse.ArgumentParser(description="Создание JSON для плеера Владимира Волкова")
+    parser.add_argument('--sharded', action='store_true',
+                        help="дополнительно записать манифест и шарды альбомов/текстов (shardsDir каталога)")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args, 'create_volkov_player_json')
 
-    # Сохраняем
-    output_file = Path('/home/user/VLK/volkov_content.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=2)
+    print("Creating Volkov music player JSON...\n")
 
-    # Также сохраняем в VOLKOV2.0
-    output_file2 = Path('/home/user/VLK/VOLKOV2.0/content.json')
-    with open(output_file2, 'w', encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=2)
+    # Сохраняем в корень и в VOLKOV2.0 за один проход
+    output_files = [catalog_path(output) for output in VOLKOV['outputs']]
+    album_stats = write_player_json(output_files)
 
     print(f"{'='*60}")
-    print(f"✓ Created {output_file}")
-    print(f"✓ Created {output_file2}")
+    for output_file in output_files:
+        print(f"✓ Created {output_file}")
+
+    # Версия и патч относительно предыдущей опубликованной версии
+    with profiling.stage('publish_version'):
+        versions = publish_version(output_files[-1], catalog_path(VOLKOV['versionsDir']))
+    print(f"✓ Content version {versions['version']}")
+    if versions['patches'] and versions['patches'][-1]['to'] == versions['version']:
+        last_patch = versions['patches'][-1]
+        print(f"  Patch {last_patch['file']}: {last_patch['operations']} operations, {last_patch['size']} bytes")
+
+    if args.sharded:
+        content = create_player_json()
+        with profiling.stage('write_shards'):
+            manifest_file = write_sharded_content(content, catalog_path(VOLKOV['shardsDir']))
+        print(f"✓ Created {manifest_file} (+ album and text shards)")
     print(f"{'='*60}")
     print(f"\nStatistics:")
-    print(f"  Albums: {len(content['albums'])}")
-    print(f"  Total tracks: {len(content['stihi'])}")
+    print(f"  Albums: {len(album_stats)}")
+    print(f"  Total tracks: {sum(count for _, count in album_stats)}")
     print(f"\nAlbums:")
-    for i, album in enumerate(content['albums'], 1):
-        print(f"  CD{i}: {album['name']} - {len(album['tracks'])} tracks")
+    for i, (album_name, track_count) in enumerate(album_stats, 1):
+        print(f"  CD{i}: {album_name} - {track_count} tracks")
 
     print("\n✓ Conversion complete!")
     print("\nNext steps:")
@@ -178,6 +410,7 @@ def main():
     print("2. Добавить 52 песни раннего творчества из папки TEXT")
     print("3. Настроить правильные пути к изображениям")
     print("4. Обновить ссылки на социальные сети")
+    profiling.finish()
 
 if __name__ == '__main__':
     main()
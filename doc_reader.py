@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Чтение текста из файлов Word 97-2003 (.doc) без внешних программ
+Разбор составного файла OLE2 (CFB), поиск потока WordDocument,
+таблицы фрагментов (piece table) и декодирование текста (UTF-16 и 8-битные фрагменты)
+"""
+
+import argparse
+import struct
+import subprocess
+import time
+from pathlib import Path
+
+from verified_texts import clean_text_lines
+
+CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+FREESECT = 0xFFFFFFFF
+ENDOFCHAIN = 0xFFFFFFFE
+
+STREAM_OBJECT = 2
+ROOT_OBJECT = 5
+
+WORD_IDENT = 0xA5EC
+
+# Кодировка 8-битных (сжатых) фрагментов текста. По спецификации это cp1252,
+# но в русских документах из старых конвертеров встречается cp1251
+COMPRESSED_ENCODING = 'cp1251'
+
+class DocFormatError(ValueError):
+    """Файл не является поддерживаемым документом Word 97-2003"""
+
+class CompoundFile:
+    """Минимальный читатель составного файла OLE2: только чтение потоков по имени"""
+
+    def __init__(self, data):
+        if data[:8] != CFB_SIGNATURE:
+            raise DocFormatError("not an OLE2 compound file")
+
+        self.data = data
+        (sector_shift, mini_sector_shift) = struct.unpack_from('<HH', data, 0x1E)
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_sector_shift
+
+        (fat_count, dir_start) = struct.unpack_from('<II', data, 0x2C)
+        (self.mini_cutoff, mini_fat_start, mini_fat_count,
+         difat_start, difat_count) = struct.unpack_from('<IIIII', data, 0x38)
+
+        self.fat = self._read_fat(fat_count, difat_start, difat_count)
+        self.entries = self._read_directory(dir_start)
+
+        root = self.entries.get('Root Entry')
+        if root is None:
+            raise DocFormatError("compound file has no root entry")
+
+        self.mini_stream = self._read_chain(root[0], self.fat, self._sector) if root[1] else b''
+        self.mini_stream = self.mini_stream[:root[1]]
+        if mini_fat_start != ENDOFCHAIN and mini_fat_count:
+            self.mini_fat = self._unpack_sectors(self._read_chain(mini_fat_start, self.fat, self._sector))
+        else:
+            self.mini_fat = []
+
+    def _sector(self, index):
+        offset = (index + 1) * self.sector_size
+        if offset >= len(self.data):
+            raise DocFormatError(f"sector {index} is outside the file")
+        return self.data[offset:offset + self.sector_size]
+
+    def _mini_sector(self, index):
+        offset = index * self.mini_sector_size
+        return self.mini_stream[offset:offset + self.mini_sector_size]
+
+    @staticmethod
+    def _unpack_sectors(raw):
+        return list(struct.unpack(f'<{len(raw) // 4}I', raw[:len(raw) // 4 * 4]))
+
+    def _read_fat(self, fat_count, difat_start, difat_count):
+        fat_sectors = list(struct.unpack_from('<109I', self.data, 0x4C))
+
+        # Дополнительные сектора DIFAT: последнее значение - ссылка на следующий
+        sector = difat_start
+        for _ in range(difat_count):
+            if sector in (ENDOFCHAIN, FREESECT):
+                break
+            values = self._unpack_sectors(self._sector(sector))
+            fat_sectors.extend(values[:-1])
+            sector = values[-1]
+
+        fat = []
+        for sector in fat_sectors[:fat_count]:
+            if sector == FREESECT:
+                continue
+            fat.extend(self._unpack_sectors(self._sector(sector)))
+        return fat
+
+    @staticmethod
+    def _read_chain(start, fat, read_sector):
+        chunks = []
+        sector = start
+        seen = set()
+        while sector not in (ENDOFCHAIN, FREESECT):
+            if sector in seen or sector >= len(fat):
+                raise DocFormatError("broken sector chain")
+            seen.add(sector)
+            chunks.append(read_sector(sector))
+            sector = fat[sector]
+        return b''.join(chunks)
+
+    def _read_directory(self, dir_start):
+        raw = self._read_chain(dir_start, self.fat, self._sector)
+        entries = {}
+        for offset in range(0, len(raw) - 127, 128):
+            name_length, object_type = struct.unpack_from('<HB', raw, offset + 0x40)
+            if object_type not in (STREAM_OBJECT, ROOT_OBJECT) or name_length < 2:
+                continue
+            name = raw[offset:offset + name_length - 2].decode('utf-16-le', errors='replace')
+            start, size = struct.unpack_from('<II', raw, offset + 0x74)
+            entries.setdefault(name, (start, size, object_type))
+        return entries
+
+    def open_stream(self, name):
+        """Содержимое потока по имени"""
+        if name not in self.entries:
+            raise DocFormatError(f"stream {name!r} not found")
+
+        start, size, object_type = self.entries[name]
+        if object_type != ROOT_OBJECT and size < self.mini_cutoff:
+            raw = self._read_chain(start, self.mini_fat, self._mini_sector)
+        else:
+            raw = self._read_chain(start, self.fat, self._sector)
+        return raw[:size]
+
+def _read_pieces(table, fc_clx, lcb_clx):
+    """Разбор Clx: пропуск Prc и чтение PlcPcd -> [(cp_start, cp_end, fc, compressed)]"""
+    position = fc_clx
+    end = fc_clx + lcb_clx
+    while position < end:
+        clxt = table[position]
+        if clxt == 0x01:
+            (grpprl_size,) = struct.unpack_from('<h', table, position + 1)
+            position += 3 + grpprl_size
+        elif clxt == 0x02:
+            (plc_size,) = struct.unpack_from('<I', table, position + 1)
+            plc = table[position + 5:position + 5 + plc_size]
+            count = (plc_size - 4) // 12
+            cps = struct.unpack_from(f'<{count + 1}I', plc, 0)
+            pieces = []
+            for i in range(count):
+                (fc_value,) = struct.unpack_from('<I', plc, (count + 1) * 4 + i * 8 + 2)
+                compressed = bool(fc_value & 0x40000000)
+                fc = fc_value & 0x3FFFFFFF
+                pieces.append((cps[i], cps[i + 1], fc // 2 if compressed else fc, compressed))
+            return pieces
+        else:
+            raise DocFormatError(f"unexpected Clx entry type {clxt:#x}")
+    raise DocFormatError("piece table not found")
+
+def _remove_fields(text):
+    """Оставляет только результат полей Word: \\x13 код \\x14 результат \\x15"""
+    result = []
+    stack = []  # для каждого открытого поля: показывать ли текст
+    for char in text:
+        if char == '\x13':
+            stack.append(False)
+        elif char == '\x14':
+            if stack:
+                stack[-1] = True
+        elif char == '\x15':
+            if stack:
+                stack.pop()
+        elif all(stack):
+            result.append(char)
+    return ''.join(result)
+
+SPECIAL_CHARS = str.maketrans({
+    '\r': '\n',      # конец абзаца
+    '\x0b': '\n',    # разрыв строки
+    '\x0c': '\n',    # разрыв страницы/раздела
+    '\x07': '\n',    # конец ячейки таблицы
+    '\x1e': '-',     # неразрывный дефис
+    '\x1f': None,    # мягкий перенос
+    '\xa0': ' ',
+    '\x01': None,    # рисунок
+    '\x02': None,    # ссылка на сноску
+    '\x08': None,    # графический объект
+    '\x05': None,    # ссылка на примечание
+})
+
+def read_doc_text(filepath, encoding=COMPRESSED_ENCODING):
+    """Текст основного документа .doc (без колонтитулов и сносок)"""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+
+    compound = CompoundFile(data)
+    word = compound.open_stream('WordDocument')
+
+    ident, nfib = struct.unpack_from('<HH', word, 0)
+    if ident != WORD_IDENT:
+        raise DocFormatError("WordDocument stream has no Word signature")
+    if nfib < 0x00C1:
+        raise DocFormatError(f"Word 6/95 documents are not supported (nFib={nfib:#x})")
+
+    (flags,) = struct.unpack_from('<H', word, 0x0A)
+    if flags & 0x0100:
+        raise DocFormatError("document is encrypted")
+
+    table_name = '1Table' if flags & 0x0200 else '0Table'
+    table = compound.open_stream(table_name)
+
+    # FibBase (32 байта), затем fibRgW, fibRgLw, fibRgFcLcb
+    position = 32
+    (csw,) = struct.unpack_from('<H', word, position)
+    position += 2 + csw * 2
+    (cslw,) = struct.unpack_from('<H', word, position)
+    fib_rg_lw = position + 2
+    (ccp_text,) = struct.unpack_from('<i', word, fib_rg_lw + 3 * 4)
+    position = fib_rg_lw + cslw * 4
+    fib_rg_fc_lcb = position + 2
+    fc_clx, lcb_clx = struct.unpack_from('<II', word, fib_rg_fc_lcb + 33 * 8)
+
+    chunks = []
+    for cp_start, cp_end, fc, compressed in _read_pieces(table, fc_clx, lcb_clx):
+        if cp_start >= ccp_text:
+            break
+        count = min(cp_end, ccp_text) - cp_start
+        if compressed:
+            chunks.append(word[fc:fc + count].decode(encoding, errors='replace'))
+        else:
+            chunks.append(word[fc:fc + count * 2].decode('utf-16-le', errors='replace'))
+
+    return _remove_fields(''.join(chunks)).translate(SPECIAL_CHARS)
+
+def read_doc_lines(filepath, encoding=COMPRESSED_ENCODING):
+    """Строки документа: пробелы обрезаны, подряд идущие пустые строки схлопнуты"""
+    return clean_text_lines(read_doc_text(filepath, encoding).split('\n'))
+
+def run_benchmark(doc_files):
+    """Сравнение времени чтения .doc в процессе и через antiword"""
+    start = time.perf_counter()
+    failures = 0
+    for doc_file in doc_files:
+        try:
+            read_doc_lines(doc_file)
+        except DocFormatError as e:
+            failures += 1
+            print(f"  ✗ {doc_file.name}: {e}")
+    in_process = time.perf_counter() - start
+
+    antiword = None
+    try:
+        start = time.perf_counter()
+        for doc_file in doc_files:
+            subprocess.run(['antiword', str(doc_file)], capture_output=True, timeout=60)
+        antiword = time.perf_counter() - start
+    except FileNotFoundError:
+        pass
+
+    print(f"{'='*60}")
+    print(f"Documents: {len(doc_files)}, failed in-process: {failures}")
+    print(f"  doc_reader: {in_process * 1000:8.1f} ms total, {in_process * 1000 / len(doc_files):6.2f} ms/file")
+    if antiword is None:
+        print("  antiword:   not installed")
+    else:
+        print(f"  antiword:   {antiword * 1000:8.1f} ms total, {antiword * 1000 / len(doc_files):6.2f} ms/file")
+    print(f"{'='*60}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Чтение текста из .doc без antiword")
+    parser.add_argument('files', nargs='*', type=Path, help=".doc файлы для вывода текста")
+    parser.add_argument('--benchmark', action='store_true', help="сравнить с antiword на папке TEXT")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        doc_files = sorted(Path('/home/user/VLK/TEXT').glob('*.doc'))
+        run_benchmark(doc_files)
+        return
+
+    for doc_file in args.files:
+        print(f"=== {doc_file.name}")
+        for line in read_doc_lines(doc_file):
+            print(line)
+        print()
+
+if __name__ == '__main__':
+    main()
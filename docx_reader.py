@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Потоковое чтение абзацев из .docx без python-docx
+word/document.xml читается через zipfile и ElementTree.iterparse,
+абзацы отдаются по одному, пустые абзацы - разделители строф
+"""
+
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+
+W_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+PARAGRAPH = W_NAMESPACE + 'p'
+TEXT = W_NAMESPACE + 't'
+TAB = W_NAMESPACE + 'tab'
+BREAK = W_NAMESPACE + 'br'
+CARRIAGE_RETURN = W_NAMESPACE + 'cr'
+
+def iter_docx_paragraphs(filepath):
+    """Генерирует текст абзацев документа; разрывы строк внутри абзаца дают отдельные строки"""
+    with zipfile.ZipFile(filepath) as archive:
+        with archive.open('word/document.xml') as document:
+            # Стек нужен для абзацев, вложенных в надписи внутри другого абзаца
+            stack = []
+            for event, elem in ET.iterparse(document, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == PARAGRAPH:
+                        stack.append([])
+                    continue
+
+                if not stack:
+                    continue
+
+                if tag == TEXT:
+                    stack[-1].append(elem.text or '')
+                elif tag == TAB:
+                    stack[-1].append('\t')
+                elif tag in (BREAK, CARRIAGE_RETURN):
+                    stack[-1].append('\n')
+                elif tag == PARAGRAPH:
+                    for line in ''.join(stack.pop()).split('\n'):
+                        yield line
+                    elem.clear()
+
+def read_docx_lines(filepath):
+    """Строки документа: пробелы обрезаны, пустой абзац - пустая строка"""
+    return [paragraph.strip() for paragraph in iter_docx_paragraphs(filepath)]
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        print(f"=== {path}")
+        for line in read_docx_lines(path):
+            print(line)
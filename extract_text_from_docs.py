@@ -6,15 +6,22 @@
 """
 
 import os
+import argparse
+import hashlib
 import json
+import multiprocessing
+import struct
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from multiprocessing.connection import wait
 from pathlib import Path
 
-try:
-    from docx import Document
-    HAS_DOCX = True
-except ImportError:
-    HAS_DOCX = False
-    print("WARNING: python-docx not installed. Install with: pip install python-docx")
+import profiling
+from doc_reader import DocFormatError, read_doc_lines
+from docx_reader import read_docx_lines
+from verified_texts import load_verified_texts, match_verified
 
 try:
     import subprocess
@@ -22,26 +29,31 @@ try:
 except:
     HAS_ANTIWORD = False
 
-def extract_from_docx(filepath):
-    """Извлечение текста из .docx файла"""
-    if not HAS_DOCX:
-        return None
+# Ограничение времени на один документ, чтобы битый файл не останавливал всю обработку
+DOC_TIMEOUT = 60
+MAX_WORKERS = min(8, os.cpu_count() or 1)
 
+# Версия извлечения: при изменении логики извлекателей увеличить, чтобы сбросить кэш
+EXTRACTOR_VERSION = 4
+CACHE_FILENAME = '.extract_cache.json'
+
+def extract_from_docx(filepath):
+    """Извлечение текста из .docx файла (пустой абзац - разделитель строф)"""
     try:
-        doc = Document(filepath)
-        lines = []
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if text:
-                lines.append(text)
-            else:
-                lines.append("")  # Пустая строка для разделения строф
-        return lines
-    except Exception as e:
+        return read_docx_lines(filepath)
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError) as e:
         print(f"ERROR extracting {filepath}: {e}")
         return None
 
-def extract_from_doc(filepath):
+def extract_from_doc(filepath, timeout=DOC_TIMEOUT):
+    """Извлечение текста из .doc файла: сначала в процессе, для неподдерживаемых файлов через antiword"""
+    try:
+        return read_doc_lines(filepath)
+    except (DocFormatError, struct.error, IndexError) as e:
+        print(f"WARNING: {filepath.name}: {e}, falling back to antiword")
+        return extract_from_doc_antiword(filepath, timeout)
+
+def extract_from_doc_antiword(filepath, timeout=DOC_TIMEOUT):
     """Извлечение текста из .doc файла через antiword"""
     try:
         result = subprocess.run(
@@ -49,7 +61,8 @@ def extract_from_doc(filepath):
             capture_output=True,
             text=True,
             encoding='utf-8',
-            errors='ignore'
+            errors='ignore',
+            timeout=timeout
         )
         if result.returncode == 0:
             text = result.stdout
@@ -68,6 +81,9 @@ def extract_from_doc(filepath):
     except FileNotFoundError:
         print("ERROR: antiword not found. Install with: apt-get install antiword")
         return None
+    except subprocess.TimeoutExpired:
+        print(f"ERROR: antiword timed out after {timeout}s for {filepath}")
+        return None
     except Exception as e:
         print(f"ERROR extracting {filepath}: {e}")
         return None
@@ -95,7 +111,168 @@ def get_title_from_filename(filename):
 
     return title
 
+def _timed(extractor, filepath, *args):
+    """Вызывает извлечение и возвращает (строки, время в секундах, начало по perf_counter, pid процесса)"""
+    start = time.perf_counter()
+    lines = extractor(filepath, *args)
+    return lines, time.perf_counter() - start, start, os.getpid()
+
+def _extract_worker(connection, timeout):
+    """Рабочий процесс: получает документы по одному и отвечает результатом _timed или ('error', текст); None - конец"""
+    while True:
+        doc_file = connection.recv()
+        if doc_file is None:
+            break
+        try:
+            if doc_file.name.endswith('.docx'):
+                connection.send(_timed(extract_from_docx, doc_file))
+            else:
+                connection.send(_timed(extract_from_doc, doc_file, timeout))
+        except Exception as e:
+            connection.send(('error', f"{type(e).__name__}: {e}"))
+    connection.close()
+
+def _start_worker(context, timeout):
+    connection, child_connection = context.Pipe()
+    process = context.Process(target=_extract_worker, args=(child_connection, timeout), daemon=True)
+    process.start()
+    child_connection.close()
+    return connection, process
+
+def extract_documents(doc_files, max_workers=MAX_WORKERS, timeout=DOC_TIMEOUT):
+    """
+    Параллельное извлечение .doc и .docx в max_workers рабочих процессах, документ за документом.
+    У каждого документа свой срок timeout с момента выдачи; процесс, не уложившийся в срок
+    (в том числе на разборе .doc в процессе, а не только в antiword), убивается и заменяется новым.
+    Возвращает {файл: (строки или None, время)}
+    """
+    results = {}
+    pending = deque(doc_files)
+    context = multiprocessing.get_context()
+    idle = [_start_worker(context, timeout) for _ in range(min(max_workers, len(doc_files)))]
+    busy = {}
+
+    try:
+        while pending or busy:
+            while pending and idle:
+                connection, process = idle.pop()
+                doc_file = pending.popleft()
+                connection.send(doc_file)
+                busy[connection] = (process, doc_file, time.monotonic() + timeout)
+
+            next_deadline = min(deadline for _, _, deadline in busy.values())
+            for connection in wait(list(busy), timeout=max(0.0, next_deadline - time.monotonic())):
+                process, doc_file, _ = busy.pop(connection)
+                try:
+                    result = connection.recv()
+                except EOFError:
+                    # Процесс завершился, ничего не отправив (упал интерпретатор, убит извне)
+                    connection.close()
+                    process.join()
+                    print(f"ERROR extracting {doc_file}: worker exited with code {process.exitcode}")
+                    results[doc_file] = (None, 0.0)
+                    if pending:
+                        idle.append(_start_worker(context, timeout))
+                    continue
+
+                idle.append((connection, process))
+                if result[0] == 'error':
+                    print(f"ERROR extracting {doc_file}: {result[1]}")
+                    results[doc_file] = (None, 0.0)
+                    continue
+                lines, seconds, started, pid = result
+                results[doc_file] = (lines, seconds)
+                profiling.add_span('extract_document', started, seconds, pid=pid, file=doc_file.name)
+
+            now = time.monotonic()
+            for connection, (process, doc_file, deadline) in list(busy.items()):
+                if deadline <= now:
+                    print(f"ERROR: extraction timed out for {doc_file}")
+                    process.kill()
+                    process.join()
+                    connection.close()
+                    del busy[connection]
+                    results[doc_file] = (None, float(timeout))
+                    if pending:
+                        idle.append(_start_worker(context, timeout))
+    finally:
+        for connection, process in idle:
+            connection.send(None)
+            connection.close()
+        for connection, (process, _, _) in busy.items():
+            process.kill()
+            connection.close()
+        for connection, process in idle:
+            process.join()
+        for process, _, _ in busy.values():
+            process.join()
+
+    return results
+
+def file_sha256(filepath):
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_cache(cache_file):
+    """Кэш извлечения: {имя документа: {sha256, extractor_version, entry}}"""
+    if not cache_file.exists():
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"WARNING: cache {cache_file} is unreadable, re-extracting everything")
+        return {}
+
+def write_json_if_changed(path, data):
+    """Перезаписывает JSON файл, только если его содержимое изменилось"""
+    payload = json.dumps(data, ensure_ascii=False, indent=2)
+    if path.exists() and path.read_text(encoding='utf-8') == payload:
+        return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    return True
+
+def link_verified(entry, verified_texts):
+    """Отмечает у записи документа наличие верифицированного текста (.mp3.json)"""
+    match = match_verified(entry['title'], verified_texts)
+    entry['has_json'] = match is not None
+    entry['verified_file'] = f"verified/{match['title']}.txt" if match else None
+    return entry
+
+def write_verified_texts(verified_texts, output_dir):
+    """Сохраняет верифицированные тексты в TEXT_EXTRACTED/verified, возвращает записи индекса"""
+    verified_dir = output_dir / 'verified'
+    verified_dir.mkdir(exist_ok=True)
+
+    entries = []
+    for verified in verified_texts:
+        output_file = verified_dir / f"{verified['title']}.txt"
+        content = verified['heading'] + '\n\n' + ''.join(line + '\n' for line in verified['text'])
+        if not output_file.exists() or output_file.read_text(encoding='utf-8') != content:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        entries.append({
+            'title': verified['title'],
+            'source_file': verified['source_file'],
+            'output_file': f"verified/{output_file.name}",
+            'verified': True,
+            'lines_count': len(verified['text'])
+        })
+    return entries
+
 def main():
+    parser = argparse.ArgumentParser(description="Извлечение текстов из .doc/.docx папки TEXT")
+    parser.add_argument('--force', action='store_true', help="игнорировать кэш и извлечь всё заново")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args, 'extract_text_from_docs')
+
     text_dir = Path('/home/user/VLK/TEXT')
     output_dir = Path('/home/user/VLK/TEXT_EXTRACTED')
     output_dir.mkdir(exist_ok=True)
@@ -105,64 +282,115 @@ def main():
 
     print(f"Found {len(doc_files)} documents\n")
 
+    start = time.perf_counter()
+
+    cache_file = output_dir / CACHE_FILENAME
+    cache = {} if args.force else load_cache(cache_file)
+
+    # Документы с неизменным хешем и версией извлекателя пропускаем
+    with profiling.stage('hash_documents'):
+        hashes = {doc_file: file_sha256(doc_file) for doc_file in doc_files}
+    changed = []
+    for doc_file in doc_files:
+        cached = cache.get(doc_file.name)
+        if (cached and cached['sha256'] == hashes[doc_file]
+                and cached['extractor_version'] == EXTRACTOR_VERSION
+                and (cached['entry'] is None or (output_dir / cached['entry']['output_file']).exists())):
+            profiling.count('files_skipped')
+            continue
+        changed.append(doc_file)
+    if profiling.enabled():
+        profiling.count('files_read', len(changed))
+        profiling.count('bytes_read', sum(doc_file.stat().st_size for doc_file in changed))
+
+    with profiling.stage('extract_documents', workers=MAX_WORKERS):
+        results = extract_documents(changed) if changed else {}
+    with profiling.stage('load_verified'):
+        verified_texts = load_verified_texts(text_dir)
+    new_cache = {}
     extracted = []
 
+    # Результаты обрабатываются в порядке файлов, поэтому index.json детерминирован
     for doc_file in doc_files:
-        if doc_file.name.endswith('.docx'):
-            print(f"Processing: {doc_file.name} (.docx)")
-            lines = extract_from_docx(doc_file)
-        else:
-            print(f"Processing: {doc_file.name} (.doc)")
-            lines = extract_from_doc(doc_file)
+        if doc_file not in results:
+            entry = cache[doc_file.name]['entry']
+            if entry:
+                # .mp3.json мог появиться или исчезнуть без изменения документа
+                extracted.append(link_verified(entry, verified_texts))
+            new_cache[doc_file.name] = cache[doc_file.name]
+            continue
+
+        lines, seconds = results[doc_file]
+        kind = '.docx' if doc_file.name.endswith('.docx') else '.doc'
+        print(f"Processing: {doc_file.name} ({kind}, {seconds * 1000:.0f} ms)")
 
+        entry = None
         if lines:
             title = get_title_from_filename(doc_file.name)
 
-            # Проверяем, есть ли .mp3.json файл с таким же названием
-            json_file = text_dir / f"{title}.mp3.json"
-            has_json = json_file.exists()
-
             # Сохраняем извлеченный текст
             output_file = output_dir / f"{title}.txt"
             with open(output_file, 'w', encoding='utf-8') as f:
                 f.write(title + '\n\n')
                 for line in lines:
                     f.write(line + '\n')
+            profiling.count('files_written')
 
-            extracted.append({
+            entry = link_verified({
                 'title': title,
                 'source_file': doc_file.name,
                 'output_file': output_file.name,
-                'has_json': has_json,
+                'verified': False,
                 'lines_count': len(lines)
-            })
+            }, verified_texts)
+            extracted.append(entry)
 
             print(f"  ✓ Extracted: {title}")
-            print(f"    Lines: {len(lines)}, Has JSON: {has_json}")
+            print(f"    Lines: {len(lines)}, Has JSON: {entry['has_json']}")
         else:
             print(f"  ✗ Failed to extract")
 
+        # Неудачные извлечения не кэшируем, чтобы повторить их в следующий раз
+        if lines:
+            new_cache[doc_file.name] = {
+                'sha256': hashes[doc_file],
+                'extractor_version': EXTRACTOR_VERSION,
+                'entry': entry
+            }
+
         print()
 
-    # Сохраняем индекс
+    # Верифицированные тексты идут в индекс отдельными записями
+    with profiling.stage('write_verified'):
+        verified_entries = write_verified_texts(verified_texts, output_dir)
+    documents_count = len(extracted)
+    extracted.extend(verified_entries)
+
+    # Сохраняем индекс и кэш (только при изменениях)
     index_file = output_dir / 'index.json'
-    with open(index_file, 'w', encoding='utf-8') as f:
-        json.dump(extracted, f, ensure_ascii=False, indent=2)
+    with profiling.stage('write_index'):
+        index_changed = write_json_if_changed(index_file, extracted)
+        write_json_if_changed(cache_file, new_cache)
+
+    elapsed = time.perf_counter() - start
 
     print(f"\n{'='*60}")
-    print(f"Extracted {len(extracted)} documents")
+    print(f"Extracted {len(changed)} documents, {len(doc_files) - len(changed)} unchanged (cached)")
+    print(f"Time: {elapsed:.2f}s ({MAX_WORKERS} workers)")
     print(f"Saved to: {output_dir}")
-    print(f"Index: {index_file}")
+    print(f"Index: {index_file} ({'updated' if index_changed else 'unchanged'})")
     print(f"{'='*60}")
 
     # Статистика
-    with_json = sum(1 for item in extracted if item['has_json'])
-    without_json = len(extracted) - with_json
+    with_json = sum(1 for item in extracted if not item['verified'] and item['has_json'])
+    without_json = documents_count - with_json
 
     print(f"\nStatistics:")
     print(f"  With .mp3.json files: {with_json}")
     print(f"  Without .mp3.json:    {without_json}")
-    print(f"  Total:                {len(extracted)}")
+    print(f"  Documents:            {documents_count}")
+    print(f"  Verified texts:       {len(verified_entries)}")
+    profiling.finish()
 
 if __name__ == '__main__':
     main()
@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import re
 import json
 import shutil
 from pathlib import Path
 
+import profiling
+
 def parse_ssilki_file(filepath):
     """Parse ssilki file and extract track number -> URL mapping"""
     links = {}
 
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
+    profiling.count('files_read')
 
     # Remove [cite_start] and [cite: N] markers
     content = re.sub(r'\[cite_start\]', '', content)
@@ -28,80 +32,103 @@ def parse_ssilki_file(filepath):
 
     return links
 
+def fix_json_file(json_file, album, album_links, cd_source, cd_target):
+    """Copy one track JSON (and its TXT) to cd_target with the link from ssilki"""
+    # Extract track number from filename
+    track_num_str = json_file.name.split('_')[0]
+    try:
+        track_num = int(track_num_str)
+    except ValueError:
+        print(f"WARNING: Can't parse track number from {json_file.name}")
+        profiling.count('files_skipped')
+        return
+
+    # Load JSON
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    profiling.count('files_read')
+
+    # Replace link with correct one from ssilki
+    if track_num in album_links:
+        correct_link = album_links[track_num]['url']
+        data['link'] = correct_link
+        print(f"Fixed: CD{album} track {track_num:02d} - {data['title']}")
+    else:
+        print(f"WARNING: No link found for CD{album} track {track_num}")
+
+    # Save fixed JSON
+    target_file = cd_target / json_file.name
+    with open(target_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    profiling.count('files_written')
+
+    # Copy TXT file as well
+    txt_pattern = f"{track_num:02d}_{album}_*.txt"
+    txt_files = list(cd_source.glob(txt_pattern))
+    if txt_files:
+        for txt_file in txt_files:
+            # Update JSON in TXT file as well
+            with open(txt_file, 'r', encoding='utf-8') as f:
+                txt_content = f.read()
+            profiling.count('files_read')
+
+            # Find JSON part and replace
+            json_start = txt_content.rfind('{')
+            if json_start != -1:
+                txt_before_json = txt_content[:json_start]
+                new_txt_content = txt_before_json + json.dumps(data, ensure_ascii=False, indent=2)
+
+                target_txt = cd_target / txt_file.name
+                with open(target_txt, 'w', encoding='utf-8') as f:
+                    f.write(new_txt_content)
+                profiling.count('files_written')
+            else:
+                profiling.count('files_skipped')
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Copy STIHI_VOLKOV to VOLKOV2.0 with links from ssilki")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args, 'fix_links_in_json')
+
     # Parse all ssilki files
     ssilki_dir = Path('/home/user/VLK/VOLKOV2.0_temp')
     all_links = {}
 
-    for i in range(1, 6):
-        ssilki_file = ssilki_dir / f'ssilki0{i}.txt'
-        links = parse_ssilki_file(ssilki_file)
-        all_links[i] = links
-        print(f"Parsed {len(links)} links from album {i}")
+    with profiling.stage('parse_ssilki'):
+        for i in range(1, 6):
+            ssilki_file = ssilki_dir / f'ssilki0{i}.txt'
+            links = parse_ssilki_file(ssilki_file)
+            all_links[i] = links
+            print(f"Parsed {len(links)} links from album {i}")
 
     # Copy STIHI_VOLKOV to VOLKOV2.0 and fix links
     source_dir = Path('/home/user/VLK/STIHI_VOLKOV')
     target_dir = Path('/home/user/VLK/VOLKOV2.0')
 
-    # Clear target directory
-    if target_dir.exists():
-        shutil.rmtree(target_dir)
-    target_dir.mkdir()
-
-    for i in range(1, 6):
-        cd_source = source_dir / f"CD{i}"
-        cd_target = target_dir / f"CD{i}"
-        cd_target.mkdir()
-
-        # Get all JSON files
-        json_files = sorted(cd_source.glob("*.json"))
-
-        for json_file in json_files:
-            # Extract track number from filename
-            track_num_str = json_file.name.split('_')[0]
-            try:
-                track_num = int(track_num_str)
-            except ValueError:
-                print(f"WARNING: Can't parse track number from {json_file.name}")
-                continue
-
-            # Load JSON
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # Replace link with correct one from ssilki
-            if i in all_links and track_num in all_links[i]:
-                correct_link = all_links[i][track_num]['url']
-                data['link'] = correct_link
-                print(f"Fixed: CD{i} track {track_num:02d} - {data['title']}")
-            else:
-                print(f"WARNING: No link found for CD{i} track {track_num}")
-
-            # Save fixed JSON
-            target_file = cd_target / json_file.name
-            with open(target_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
-            # Copy TXT file as well
-            txt_pattern = f"{track_num:02d}_{i}_*.txt"
-            txt_files = list(cd_source.glob(txt_pattern))
-            if txt_files:
-                for txt_file in txt_files:
-                    # Update JSON in TXT file as well
-                    with open(txt_file, 'r', encoding='utf-8') as f:
-                        txt_content = f.read()
-
-                    # Find JSON part and replace
-                    json_start = txt_content.rfind('{')
-                    if json_start != -1:
-                        txt_before_json = txt_content[:json_start]
-                        new_txt_content = txt_before_json + json.dumps(data, ensure_ascii=False, indent=2)
-
-                        target_txt = cd_target / txt_file.name
-                        with open(target_txt, 'w', encoding='utf-8') as f:
-                            f.write(new_txt_content)
+    # Clear only the album folders: VOLKOV2.0 also holds ssilki, content.json, README and scripts
+    with profiling.stage('clear_target'):
+        target_dir.mkdir(exist_ok=True)
+        for cd_target in target_dir.glob('CD*'):
+            if cd_target.is_dir():
+                shutil.rmtree(cd_target)
+
+    with profiling.stage('fix_links'):
+        for i in range(1, 6):
+            cd_source = source_dir / f"CD{i}"
+            cd_target = target_dir / f"CD{i}"
+            cd_target.mkdir()
+
+            # Get all JSON files
+            json_files = sorted(cd_source.glob("*.json"))
+
+            for json_file in json_files:
+                with profiling.item('fix_json', file=json_file.name):
+                    fix_json_file(json_file, i, all_links.get(i, {}), cd_source, cd_target)
 
     print(f"\nDone! All files copied and links fixed.")
+    profiling.finish()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Поиск песни по запомнившемуся фрагменту строки
+Индекс символьных триграмм по всем строкам корпуса и ранжирование
+совпадений по коэффициенту Дайса, с бенчмарком против перебора difflib
+"""
+
+import argparse
+import difflib
+import heapq
+import random
+import time
+from array import array
+from collections import Counter
+
+from build_search_index import normalize_text
+from corpus import load_corpus
+from verified_texts import NON_WORD_PATTERN
+
+def normalize_line(line):
+    """Нормализованная строка: нижний регистр, ё→е, только буквы и цифры через пробел"""
+    return NON_WORD_PATTERN.sub(' ', normalize_text(line)).strip()
+
+def line_trigrams(line):
+    """Множество символьных триграмм строки (с пробелами по краям слов)"""
+    padded = f"  {normalize_line(line)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FragmentIndex:
+    """Триграммный индекс строк: триграмма -> массив номеров строк"""
+
+    def __init__(self, poems):
+        self.poems = poems
+        self.lines = []          # (номер стихотворения, номер строки)
+        self.trigram_counts = array('H')
+        postings = {}
+
+        for poem_idx, poem in enumerate(poems):
+            for line_no, line in enumerate(poem['text']):
+                trigrams = line_trigrams(line)
+                if not line.strip() or not trigrams:
+                    continue
+
+                line_id = len(self.lines)
+                self.lines.append((poem_idx, line_no))
+                self.trigram_counts.append(min(len(trigrams), 65535))
+                for trigram in trigrams:
+                    postings.setdefault(trigram, array('I')).append(line_id)
+
+        self.postings = postings
+
+    def line_text(self, line_id):
+        poem_idx, line_no = self.lines[line_id]
+        return self.poems[poem_idx]['text'][line_no]
+
+    def search_lines(self, fragment, limit=10):
+        """Лучшие строки для фрагмента: [(оценка, номер строки)] по убыванию оценки"""
+        query = line_trigrams(fragment)
+        if not query:
+            return []
+
+        shared = Counter()
+        for trigram in query:
+            line_ids = self.postings.get(trigram)
+            if line_ids:
+                shared.update(line_ids)
+
+        query_size = len(query)
+        counts = self.trigram_counts
+        return heapq.nlargest(
+            limit,
+            ((2.0 * common / (query_size + counts[line_id]), line_id) for line_id, common in shared.items())
+        )
+
+    def search_songs(self, fragment, limit=5, line_pool=50):
+        """Лучшие песни по лучшей совпавшей строке: [(оценка, номер стихотворения, номер строки)]"""
+        best = {}
+        for score, line_id in self.search_lines(fragment, line_pool):
+            poem_idx, line_no = self.lines[line_id]
+            if poem_idx not in best or best[poem_idx][0] < score:
+                best[poem_idx] = (score, poem_idx, line_no)
+        return sorted(best.values(), reverse=True)[:limit]
+
+def brute_force_search(lines, fragment, limit=10):
+    """Перебор всех строк через difflib (с quick_ratio отсечением, как get_close_matches)"""
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(normalize_line(fragment))
+    scored = []
+    for line_id, line in enumerate(lines):
+        matcher.set_seq1(line)
+        if matcher.real_quick_ratio() >= 0.3 and matcher.quick_ratio() >= 0.3:
+            scored.append((matcher.ratio(), line_id))
+    return heapq.nlargest(limit, scored)
+
+def distort_fragment(line, rng):
+    """Имитация неточно запомненной половины строки: часть слов и искаженные окончания"""
+    words = normalize_line(line).split()
+    if len(words) > 3:
+        start = rng.randrange(0, len(words) // 2)
+        words = words[start:start + max(3, len(words) // 2)]
+    return ' '.join(word[:-1] + 'а' if len(word) > 4 and rng.random() < 0.4 else word for word in words)
+
+def scale_corpus(poems, target_lines):
+    """Размножает корпус до нужного числа строк (копии помечаются номером)"""
+    total = sum(len(poem['text']) for poem in poems)
+    if total >= target_lines:
+        return poems
+
+    scaled = list(poems)
+    copy = 1
+    while total < target_lines:
+        for poem in poems:
+            scaled.append({**poem, 'id': f"{poem['id']}#{copy}"})
+            total += len(poem['text'])
+            if total >= target_lines:
+                break
+        copy += 1
+    return scaled
+
+def run_benchmark(poems, queries_count, brute_queries_count, seed=1):
+    """Сравнение триграммного индекса с перебором difflib"""
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    index = FragmentIndex(poems)
+    build_seconds = time.perf_counter() - start
+
+    fragments = [distort_fragment(index.line_text(rng.randrange(len(index.lines))), rng)
+                 for _ in range(queries_count)]
+
+    start = time.perf_counter()
+    indexed_results = [index.search_lines(fragment, 1) for fragment in fragments]
+    indexed_ms = (time.perf_counter() - start) * 1000 / queries_count
+
+    normalized_lines = [normalize_line(index.line_text(line_id)) for line_id in range(len(index.lines))]
+    brute_fragments = fragments[:brute_queries_count]
+
+    start = time.perf_counter()
+    brute_results = [brute_force_search(normalized_lines, fragment, 1) for fragment in brute_fragments]
+    brute_ms = (time.perf_counter() - start) * 1000 / max(1, len(brute_fragments))
+
+    # Совпадение по тексту лучшей строки (в размноженном корпусе строки повторяются)
+    agree = sum(
+        1 for indexed, brute in zip(indexed_results, brute_results)
+        if indexed and brute and normalized_lines[indexed[0][1]] == normalized_lines[brute[0][1]]
+    )
+
+    print(f"{'='*60}")
+    print(f"Poems: {len(poems)}, indexed lines: {len(index.lines)}, trigrams: {len(index.postings)}")
+    print(f"{'='*60}")
+    print(f"  Index build:          {build_seconds:8.2f} s")
+    print(f"  Trigram query:        {indexed_ms:8.2f} ms/query ({queries_count} queries)")
+    print(f"  difflib brute force:  {brute_ms:8.2f} ms/query ({len(brute_fragments)} queries)")
+    if indexed_ms:
+        print(f"  Speedup:              {brute_ms / indexed_ms:8.1f}x")
+    print(f"  Same best line:       {agree}/{len(brute_fragments)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск песни по фрагменту строки")
+    parser.add_argument('fragment', nargs='?', help="запомнившийся фрагмент")
+    parser.add_argument('--limit', type=int, default=5, help="число результатов")
+    parser.add_argument('--benchmark', action='store_true', help="сравнить с перебором difflib")
+    parser.add_argument('--scale', type=int, default=0, help="размножить корпус до N строк для бенчмарка")
+    parser.add_argument('--queries', type=int, default=200, help="число запросов в бенчмарке")
+    args = parser.parse_args()
+
+    poems = load_corpus()
+
+    if args.benchmark:
+        poems = scale_corpus(poems, args.scale)
+        run_benchmark(poems, args.queries, min(args.queries, 20))
+        return
+
+    if not args.fragment:
+        parser.error("укажите фрагмент или --benchmark")
+
+    index = FragmentIndex(poems)
+    print(f"Indexed {len(index.lines)} lines from {len(poems)} poems\n")
+
+    print("Best lines:")
+    for score, line_id in index.search_lines(args.fragment, args.limit):
+        poem = poems[index.lines[line_id][0]]
+        print(f"  {score:.2f}  {index.line_text(line_id)}  [{poem['title']} — {poem['id']}]")
+
+    print("\nBest songs:")
+    for score, poem_idx, line_no in index.search_songs(args.fragment, args.limit):
+        poem = poems[poem_idx]
+        print(f"  {score:.2f}  {poem['title']} ({poem['id']}, line {line_no + 1})")
+
+if __name__ == '__main__':
+    main()
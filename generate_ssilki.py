@@ -1,26 +1,25 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import json
 import os
 from pathlib import Path
 
-def generate_ssilki_files():
-    """Generate ssilki files for all albums based on JSON data"""
+from catalog import catalog_path, get_author
 
-    album_names = {
-        1: "Моя песня – на светлую чашу весов",
-        2: "В той области небес",
-        3: "Горит свеча",
-        4: "Наша жизнь – слишком тонкая нить",
-        5: "Не испачкавшись во лжи"
-    }
+def generate_ssilki_files(output_dir=None):
+    """Generate ssilki files for all albums based on JSON data
 
-    base_dir = Path('/home/user/VLK/STIHI_VOLKOV')
-    output_dir = Path('/home/user/VLK/V-VOLKOV')
+    By default each list is written to the album's ssilkiDir (the link lists that
+    create_all_files reads); with output_dir all lists go to that directory instead
+    """
 
-    for album_num in range(1, 6):
-        album_dir = base_dir / f"CD{album_num}"
+    albums = get_author('volkov')['albums']
+
+    for album in albums:
+        album_num = album['number']
+        album_dir = catalog_path(album['poemsDir'])
 
         # Get all JSON files in the album directory
         json_files = sorted(album_dir.glob("*.json"))
@@ -51,19 +50,23 @@ def generate_ssilki_files():
         tracks.sort(key=lambda x: x['number'])
 
         # Generate ssilki file
-        output_file = output_dir / f"CD {album_num}" / f"ssilki0{album_num}.txt"
+        target_dir = Path(output_dir) if output_dir else catalog_path(album['ssilkiDir'])
+        target_dir.mkdir(parents=True, exist_ok=True)
+        output_file = target_dir / f"ssilki0{album_num}.txt"
 
         with open(output_file, 'w', encoding='utf-8') as f:
-            album_name = album_names[album_num]
-            f.write(f"Ссылки на аудиофайлы {['первого', 'второго', 'третьего', 'четвертого', 'пятого'][album_num-1]} альбома «{album_name}»\n\n")
+            f.write(f"Ссылки на аудиофайлы {album['ordinal']} альбома «{album['name']}»\n\n")
 
             for track in tracks:
                 f.write(f"{track['number']:02d}. {track['title']} — {track['link']}\n")
 
             f.write("\n")
 
-        print(f"Created: CD {album_num}/ssilki0{album_num}.txt ({len(tracks)} tracks)")
+        print(f"Created: {output_file} ({len(tracks)} tracks)")
 
 if __name__ == '__main__':
-    generate_ssilki_files()
+    parser = argparse.ArgumentParser(description="Generate ssilki files from album JSON")
+    parser.add_argument('--output-dir', type=Path, help="write all lists to this directory instead of each album's ssilkiDir")
+    args = parser.parse_args()
+    generate_ssilki_files(args.output_dir)
     print("\nDone!")
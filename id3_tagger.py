@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Пакетная запись текстов песен (USLT) и названий (TIT2, TPE1, TALB, TRCK) в теги ID3v2 MP3 файлов
+Если новый тег помещается в существующий вместе с его заполнением (padding), он записывается
+на место старого без перезаписи аудио; иначе файл переписывается потоково с новым заполнением.
+Файлы с уже совпадающими тегами пропускаются. Несинхронизированные теги (ID3v2.3 целиком,
+ID3v2.4 по кадрам) декодируются, и прежние кадры (APIC и др.) сохраняются; файлы с тегом ID3v2.2
+не изменяются и попадают в отчет как unsupported
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from create_volkov_player_json import iter_album_dirs, iter_song_files, track_fields
+
+ARTIST = "Владимир Волков"
+LYRICS_LANGUAGE = b'rus'
+
+# Заполнение нового тега при перезаписи файла: запас для последующих правок на месте
+TAG_PADDING = 4096
+COPY_BUFFER = 1024 * 1024
+MAX_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+TEXT_FRAMES = ('TIT2', 'TPE1', 'TALB', 'TRCK')
+
+def _synchsafe(value):
+    return bytes(((value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F))
+
+def _unsynchsafe(raw):
+    value = 0
+    for byte in raw:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+def _resync(data):
+    """Снимает несинхронизацию: после каждого 0xFF был вставлен 0x00"""
+    return data.replace(b'\xff\x00', b'\xff')
+
+def _decode_text(encoding, raw):
+    """Декодирует строку ID3 по байту кодировки (0 - latin-1, 1 - UTF-16 с BOM, 2 - UTF-16BE, 3 - UTF-8)"""
+    if encoding == 0:
+        return raw.decode('latin-1')
+    if encoding == 1:
+        return raw.decode('utf-16')
+    if encoding == 2:
+        return raw.decode('utf-16-be')
+    return raw.decode('utf-8')
+
+def _split_terminated(encoding, raw):
+    """Отделяет строку, завершенную нулем (двойным для UTF-16), от остатка"""
+    if encoding in (1, 2):
+        for i in range(0, len(raw) - 1, 2):
+            if raw[i:i + 2] == b'\x00\x00':
+                return raw[:i], raw[i + 2:]
+        return raw, b''
+    head, _, tail = raw.partition(b'\x00')
+    return head, tail
+
+def read_tag(f):
+    """
+    Читает тег ID3v2 в начале файла.
+    Возвращает (размер тега с заголовком, [(id кадра, флаги, данные)], версия, флаги тега)
+    или (0, [], None, 0), если тега нет. Данные кадров возвращаются без несинхронизации
+    (флаг несинхронизации кадра снят); для ID3v2.2 и неизвестных версий кадры - None
+    """
+    f.seek(0)
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0, [], None, 0
+
+    version = header[3]
+    tag_flags = header[5]
+    body_size = _unsynchsafe(header[6:10])
+    tag_size = 10 + body_size + (10 if tag_flags & 0x10 else 0)
+    body = f.read(body_size)
+
+    if version not in (3, 4):
+        # ID3v2.2 (трехсимвольные кадры) не разбираем, а замена тега целиком потеряла бы кадры
+        return tag_size, None, version, tag_flags
+    if version == 3 and tag_flags & 0x80:
+        # В ID3v2.3 несинхронизация применяется ко всему тегу
+        body = _resync(body)
+
+    frames = []
+    position = 0
+    if tag_flags & 0x40:
+        # Расширенный заголовок
+        if version == 4:
+            position = _unsynchsafe(body[:4])
+        else:
+            position = 4 + int.from_bytes(body[:4], 'big')
+
+    while position + 10 <= len(body):
+        frame_id = body[position:position + 4]
+        if frame_id[0] == 0:
+            break  # начало заполнения
+        if version == 4:
+            size = _unsynchsafe(body[position + 4:position + 8])
+        else:
+            size = int.from_bytes(body[position + 4:position + 8], 'big')
+        flags = body[position + 8:position + 10]
+        data = body[position + 10:position + 10 + size]
+        if version == 4 and (tag_flags & 0x80 or flags[1] & 0x02):
+            # В ID3v2.4 несинхронизация - свойство кадра; кадр переписывается уже без нее
+            data = _resync(data)
+            flags = bytes((flags[0], flags[1] & ~0x02))
+        frames.append((frame_id.decode('latin-1'), flags, data))
+        position += 10 + size
+
+    return tag_size, frames, version, tag_flags
+
+def frame_value(frame_id, data):
+    """Значение кадра для сравнения: текст для T***, (язык, описание, текст) для USLT"""
+    if not data:
+        return None
+    encoding = data[0]
+    try:
+        if frame_id == 'USLT':
+            language = data[1:4]
+            description, text = _split_terminated(encoding, data[4:])
+            return (language, _decode_text(encoding, description), _decode_text(encoding, text).rstrip('\x00'))
+        return _decode_text(encoding, data[1:]).rstrip('\x00')
+    except UnicodeDecodeError:
+        return None
+
+def text_frame(text):
+    """Данные текстового кадра в UTF-16 с BOM (понимается и ID3v2.3, и ID3v2.4)"""
+    return b'\x01' + text.encode('utf-16')
+
+def lyrics_frame(lyrics):
+    """Данные кадра USLT: кодировка, язык, пустое описание, текст"""
+    return b'\x01' + LYRICS_LANGUAGE + ''.encode('utf-16') + b'\x00\x00' + lyrics.encode('utf-16')
+
+def desired_frames(tags):
+    """Кадры, которые должны быть в теге: {id кадра: данные}"""
+    frames = {frame_id: text_frame(tags[frame_id]) for frame_id in TEXT_FRAMES if tags.get(frame_id)}
+    if tags.get('USLT'):
+        frames['USLT'] = lyrics_frame(tags['USLT'])
+    return frames
+
+def tags_match(frames, tags):
+    """Совпадают ли существующие кадры с нужными значениями"""
+    existing = {}
+    for frame_id, _, data in frames:
+        existing.setdefault(frame_id, frame_value(frame_id, data))
+
+    for frame_id in TEXT_FRAMES:
+        if tags.get(frame_id) and existing.get(frame_id) != tags[frame_id]:
+            return False
+    if tags.get('USLT'):
+        lyrics = existing.get('USLT')
+        if not lyrics or lyrics[0] != LYRICS_LANGUAGE or lyrics[2] != tags['USLT']:
+            return False
+    return True
+
+def _frame_size(size, version):
+    return _synchsafe(size) if version == 4 else size.to_bytes(4, 'big')
+
+def build_frames(frames, tags, version):
+    """Тело тега ID3v2.<version>: прежние кадры, кроме заменяемых, и новые кадры"""
+    new_frames = desired_frames(tags)
+    chunks = []
+    for frame_id, flags, data in frames:
+        if frame_id in new_frames:
+            continue
+        chunks.append(frame_id.encode('latin-1') + _frame_size(len(data), version) + flags + data)
+    for frame_id, data in new_frames.items():
+        chunks.append(frame_id.encode('latin-1') + _frame_size(len(data), version) + b'\x00\x00' + data)
+    return b''.join(chunks)
+
+def _tag_bytes(body, body_size, version):
+    """Заголовок ID3v2 и тело, дополненное нулями до body_size"""
+    return b'ID3' + bytes((version, 0, 0)) + _synchsafe(body_size) + body + b'\x00' * (body_size - len(body))
+
+def write_tags(filepath, tags):
+    """
+    Записывает теги в MP3 файл. Возвращает 'skipped' (теги уже совпадают),
+    'unsupported' (тег ID3v2.2 - файл не изменяется), 'in-place' (тег переписан
+    в пределах старого размера) или 'rewritten'
+    """
+    filepath = Path(filepath)
+    with open(filepath, 'rb') as f:
+        tag_size, frames, version, tag_flags = read_tag(f)
+
+    if frames is None:
+        return 'unsupported'
+    if version is None:
+        version = 3
+    elif tags_match(frames, tags):
+        return 'skipped'
+
+    body = build_frames(frames, tags, version)
+
+    # Футер ID3v2.4 не переносится, поэтому его 10 байт тоже можно занять
+    available = tag_size - 10
+    if tag_size and len(body) <= available:
+        with open(filepath, 'r+b') as f:
+            f.write(_tag_bytes(body, available, version))
+        return 'in-place'
+
+    fd, temp_name = tempfile.mkstemp(prefix='.tag-', suffix='.mp3', dir=filepath.parent)
+    try:
+        with os.fdopen(fd, 'wb') as out, open(filepath, 'rb') as src:
+            out.write(_tag_bytes(body, len(body) + TAG_PADDING, version))
+            src.seek(tag_size)
+            shutil.copyfileobj(src, out, COPY_BUFFER)
+        shutil.copymode(filepath, temp_name)
+        os.replace(temp_name, filepath)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    return 'rewritten'
+
+def collect_album_tags():
+    """Теги для MP3 альбомов из JSON песен: {имя mp3 файла: теги}"""
+    album_tags = {}
+    for cd_num, album_name, cd_dir in iter_album_dirs():
+        for json_file, data in iter_song_files(cd_dir):
+            title, patch, _ = track_fields(cd_num, album_name, json_file, data)
+            album_tags[patch.split('/')[-1]] = {
+                'TIT2': title,
+                'TPE1': ARTIST,
+                'TALB': album_name,
+                'TRCK': str(int(json_file.name.split('_')[0])),
+                'USLT': '\n'.join(data['text'])
+            }
+    return album_tags
+
+def tag_files(mp3_files, album_tags, max_workers=MAX_WORKERS):
+    """Параллельно записывает теги в файлы, для которых есть JSON песни: {файл: результат}"""
+    jobs = [(mp3_file, album_tags[mp3_file.name]) for mp3_file in mp3_files if mp3_file.name in album_tags]
+
+    def run(job):
+        mp3_file, tags = job
+        try:
+            return write_tags(mp3_file, tags)
+        except OSError as e:
+            print(f"ERROR tagging {mp3_file}: {e}")
+            return 'failed'
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip((mp3_file for mp3_file, _ in jobs), pool.map(run, jobs)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Запись текстов и названий песен в теги MP3 альбомов")
+    parser.add_argument('dirs', nargs='+', type=Path, help="папки с MP3 файлами альбомов")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="число потоков")
+    args = parser.parse_args()
+
+    mp3_files = []
+    for mp3_dir in args.dirs:
+        mp3_files.extend(sorted(mp3_dir.rglob('*.mp3')))
+
+    album_tags = collect_album_tags()
+
+    start = time.perf_counter()
+    results = tag_files(mp3_files, album_tags, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'='*60}")
+    for status in ('rewritten', 'in-place', 'skipped', 'unsupported', 'failed'):
+        print(f"  {status:11} {sum(1 for value in results.values() if value == status)}")
+    for mp3_file, status in results.items():
+        if status == 'unsupported':
+            print(f"  unsupported ID3v2 version, not changed: {mp3_file}")
+    print(f"  no JSON     {len(mp3_files) - len(results)}")
+    print(f"{'='*60}")
+    print(f"Files: {len(mp3_files)}, time: {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
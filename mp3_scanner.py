@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Определение длительности, битрейта и частоты дискретизации MP3 без внешних библиотек
+Файл отображается в память (mmap), теги ID3v2 в начале и в конце файла (с футером '3DI')
+и ID3v1 пропускаются, при наличии заголовка Xing/Info или VBRI число кадров берется из него,
+иначе перебираются заголовки кадров.
+Результаты хранятся по пути файла относительно сканируемой папки. Локальная копия альбомов
+автора (mp3Dir каталога) разложена как пути плеера - '<название альбома>/<файл>.mp3',
+поэтому ключ совпадает с patch трека без ведущего '/', а одинаковые имена в разных альбомах не смешиваются
+"""
+
+import argparse
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from catalog import catalog_path, load_catalog
+
+BASE_DIR = Path('/home/user/VLK')
+# TEXT и локальные копии альбомов авторов
+MP3_DIRS = [BASE_DIR / 'TEXT'] + [catalog_path(author['mp3Dir'])
+                                  for author in load_catalog() if author.get('mp3Dir')]
+MP3_INFO_FILE = BASE_DIR / 'VOLKOV2.0' / 'mp3_info.json'
+
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Версии MPEG по двум битам заголовка: 0 - MPEG 2.5, 1 - зарезервировано, 2 - MPEG 2, 3 - MPEG 1
+MPEG1, MPEG2, MPEG25 = 3, 2, 0
+# Слои: 1 - Layer III, 2 - Layer II, 3 - Layer I
+LAYER3, LAYER2, LAYER1 = 1, 2, 3
+
+# Битрейты (кбит/с) по индексу 1..14
+BITRATES = {
+    (MPEG1, LAYER1): (32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (MPEG1, LAYER2): (32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (MPEG1, LAYER3): (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (MPEG2, LAYER1): (32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (MPEG2, LAYER2): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (MPEG2, LAYER3): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+BITRATES[(MPEG25, LAYER1)] = BITRATES[(MPEG2, LAYER1)]
+BITRATES[(MPEG25, LAYER2)] = BITRATES[(MPEG2, LAYER2)]
+BITRATES[(MPEG25, LAYER3)] = BITRATES[(MPEG2, LAYER3)]
+
+SAMPLE_RATES = {
+    MPEG1: (44100, 48000, 32000),
+    MPEG2: (22050, 24000, 16000),
+    MPEG25: (11025, 12000, 8000),
+}
+
+MONO = 3
+
+def parse_frame_header(data, offset):
+    """
+    Разбирает 4-байтовый заголовок кадра.
+    Возвращает (длина кадра, сэмплов в кадре, частота, битрейт, версия, режим каналов) или None
+    """
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = BITRATES[(version, layer)][bitrate_index - 1] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channel_mode = b3 >> 6
+
+    if layer == LAYER1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == LAYER3 and version != MPEG1 else 1152
+        length = samples // 8 * bitrate // sample_rate + padding
+
+    return length, samples, sample_rate, bitrate, version, channel_mode
+
+def synchsafe(size_bytes):
+    """Размер тега ID3v2: записан synchsafe, по 7 бит в байте"""
+    size = 0
+    for byte in size_bytes:
+        size = (size << 7) | (byte & 0x7F)
+    return size
+
+def skip_id3v2(data, offset=0):
+    """Позиция после тегов ID3v2 в начале файла (их может быть несколько подряд)"""
+    while data[offset:offset + 3] == b'ID3' and offset + 10 <= len(data):
+        flags = data[offset + 5]
+        offset += 10 + synchsafe(data[offset + 6:offset + 10]) + (10 if flags & 0x10 else 0)
+    return offset
+
+def skip_appended_id3v2(data, end):
+    """
+    Конец аудиоданных без тегов ID3v2, дописанных в конец файла (перед ID3v1):
+    такой тег заканчивается 10-байтовым футером '3DI' с тем же размером, что в заголовке
+    """
+    while end >= 20 and data[end - 10:end - 7] == b'3DI':
+        tag_size = 20 + synchsafe(data[end - 4:end])
+        if tag_size > end:
+            break
+        end -= tag_size
+    return end
+
+def find_first_frame(data, offset):
+    """Первый кадр, за которым сразу следует еще один корректный заголовок"""
+    while True:
+        offset = data.find(b'\xff', offset)
+        if offset < 0:
+            return None, None
+        header = parse_frame_header(data, offset)
+        if header:
+            next_offset = offset + header[0]
+            if next_offset >= len(data) or parse_frame_header(data, next_offset):
+                return offset, header
+        offset += 1
+
+def read_vbr_header(data, offset, header):
+    """Число кадров и байтов из заголовка Xing/Info или VBRI первого кадра: (кадры, байты, тип) или None"""
+    length, samples, sample_rate, bitrate, version, channel_mode = header
+
+    # Xing/Info находится после side information
+    if version == MPEG1:
+        side_info = 17 if channel_mode == MONO else 32
+    else:
+        side_info = 9 if channel_mode == MONO else 17
+    xing = offset + 4 + side_info
+    tag = data[xing:xing + 4]
+    if tag in (b'Xing', b'Info'):
+        flags = int.from_bytes(data[xing + 4:xing + 8], 'big')
+        position = xing + 8
+        frames = audio_bytes = None
+        if flags & 0x01:
+            frames = int.from_bytes(data[position:position + 4], 'big')
+            position += 4
+        if flags & 0x02:
+            audio_bytes = int.from_bytes(data[position:position + 4], 'big')
+        if frames:
+            return frames, audio_bytes, 'xing' if tag == b'Xing' else 'info'
+
+    # VBRI (кодировщик Fraunhofer) всегда через 32 байта после заголовка
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI':
+        audio_bytes = int.from_bytes(data[vbri + 10:vbri + 14], 'big')
+        frames = int.from_bytes(data[vbri + 14:vbri + 18], 'big')
+        if frames:
+            return frames, audio_bytes, 'vbri'
+
+    return None
+
+def walk_frames(data, offset, end):
+    """
+    Перебор заголовков кадров: (кадры, сэмплы, байты, переменный битрейт);
+    после мусора ищет следующую синхронизацию
+    """
+    frames = samples = audio_bytes = 0
+    bitrates = set()
+    while offset + 4 <= end:
+        header = parse_frame_header(data, offset)
+        if header is None:
+            offset = data.find(b'\xff', offset + 1, end)
+            if offset < 0:
+                break
+            continue
+        length = header[0]
+        if offset + length > end:
+            break
+        frames += 1
+        samples += header[1]
+        audio_bytes += length
+        bitrates.add(header[3])
+        offset += length
+    return frames, samples, audio_bytes, len(bitrates) > 1
+
+def scan_mp3(filepath):
+    """
+    Параметры MP3 файла: {duration, bitrate, sample_rate, frames, vbr, method}.
+    Возвращает None для пустых файлов и файлов без кадров MPEG; если ни один кадр
+    не удалось прочитать целиком, duration и bitrate - None
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data)
+            if end >= 128 and data[end - 128:end - 125] == b'TAG':
+                end -= 128
+            end = skip_appended_id3v2(data, end)
+
+            offset, header = find_first_frame(data, skip_id3v2(data))
+            if offset is None:
+                return None
+            sample_rate = header[2]
+
+            vbr = read_vbr_header(data, offset, header)
+            if vbr:
+                frames, audio_bytes, method = vbr
+                samples = frames * header[1]
+                if not audio_bytes:
+                    audio_bytes = end - offset
+                variable = method != 'info'
+            else:
+                frames, samples, audio_bytes, variable = walk_frames(data, offset, end)
+                method = 'frames'
+
+    duration = samples / sample_rate if samples else None
+    return {
+        "duration": round(duration, 3) if duration else None,
+        "bitrate": round(audio_bytes * 8 / duration) if duration else None,
+        "sample_rate": sample_rate,
+        "frames": frames,
+        "vbr": variable,
+        "method": method
+    }
+
+def _scan_one(filepath):
+    try:
+        return scan_mp3(filepath)
+    except (OSError, ValueError) as e:
+        print(f"ERROR scanning {filepath}: {e}")
+        return None
+
+def scan_directories(mp3_dirs, max_workers=MAX_WORKERS):
+    """Сканирует все MP3 в папках (рекурсивно) в пуле процессов: {путь относительно папки: параметры}"""
+    mp3_files = []
+    keys = []
+    for mp3_dir in mp3_dirs:
+        for mp3_file in sorted(Path(mp3_dir).rglob('*.mp3')):
+            mp3_files.append(mp3_file)
+            keys.append(mp3_file.relative_to(mp3_dir).as_posix())
+
+    results = {}
+    if not mp3_files:
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for key, info in zip(keys, pool.map(_scan_one, mp3_files, chunksize=4)):
+            if info:
+                results[key] = info
+    return dict(sorted(results.items()))
+
+def load_mp3_info(info_file=MP3_INFO_FILE):
+    """Результаты сканирования из mp3_info.json или пустой словарь"""
+    if not Path(info_file).exists():
+        return {}
+    with open(info_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Длительность и битрейт MP3 файлов")
+    parser.add_argument('dirs', nargs='*', type=Path, default=MP3_DIRS,
+                        help="папки с MP3 (по умолчанию TEXT и mp3Dir авторов каталога)")
+    parser.add_argument('--output', type=Path, default=MP3_INFO_FILE, help="файл результатов")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="число процессов")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    info = load_mp3_info(args.output)
+    info.update(scan_directories(args.dirs, args.workers))
+    elapsed = time.perf_counter() - start
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(info.items())), f, ensure_ascii=False, indent=2)
+
+    print(f"{'='*60}")
+    for name, item in info.items():
+        if item['duration'] is None:
+            print(f"  no decodable frames  {item['sample_rate']} Hz  {item['method']:6}  {name}")
+            continue
+        minutes, seconds = divmod(item['duration'], 60)
+        print(f"  {int(minutes)}:{seconds:05.2f}  {item['bitrate'] // 1000:4} kbps  "
+              f"{item['sample_rate']} Hz  {item['method']:6}  {name}")
+    print(f"{'='*60}")
+    print(f"Files: {len(info)}, time: {elapsed:.2f}s")
+    print(f"✓ Saved {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Чтение выгрузок Mp3tag (HTML/*_vlk_mp3tag.html, rannee_vlk_mp3tag.html) и списков ссылок на страницы песен
+Таблица Mp3tag разбирается HTMLParser'ом по мере чтения файла кусками: строки отдаются сразу
+после </tr>, колонки берутся из заголовков <th> (Title, Artist, Album, Track, Year, Genre, Filename).
+page_links_*.html - на самом деле текст: строка 'CD1: "Альбом"', затем пары '01. Название' / URL
+"""
+
+import argparse
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from verified_texts import normalize_title
+
+HTML_DIR = Path('/home/user/VLK/HTML')
+
+CHUNK_SIZE = 16 * 1024
+INT_COLUMNS = ('track', 'year')
+
+ALBUM_LINE_PATTERN = re.compile(r'^CD\d+:\s*"(.+)"\s*$')
+TRACK_LINE_PATTERN = re.compile(r'^(\d+)\.\s*(.+)$')
+
+class Mp3tagTableParser(HTMLParser):
+    """Собирает строки таблицы Mp3tag в словари {колонка: значение}; готовые строки копятся в rows"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.columns = []
+        self.rows = []
+        self._cells = None
+        self._cell = None
+        self._header = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._cells = []
+            self._header = False
+        elif tag in ('td', 'th') and self._cells is not None:
+            self._cell = []
+            self._header = tag == 'th'
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self._cell is not None:
+            self._cells.append(''.join(self._cell).strip())
+            self._cell = None
+        elif tag == 'tr' and self._cells is not None:
+            if self._header:
+                self.columns = [cell.lower() for cell in self._cells]
+            elif self._cells and self.columns:
+                self.rows.append(dict(zip(self.columns, self._cells)))
+            self._cells = None
+
+    def pop_rows(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+def typed_row(row):
+    """Числовые колонки (track, year) -> int или None"""
+    for column in INT_COLUMNS:
+        if column in row:
+            value = row[column].split('/')[0].strip()
+            row[column] = int(value) if value.isdigit() else None
+    return row
+
+def iter_mp3tag_rows(html_file, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки Mp3tag по мере чтения файла"""
+    parser = Mp3tagTableParser()
+    with open(html_file, 'r', encoding='utf-8-sig') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for row in parser.pop_rows():
+                yield typed_row(row)
+    parser.close()
+    for row in parser.pop_rows():
+        yield typed_row(row)
+
+def iter_page_links(links_file):
+    """Ссылки на страницы песен: {album, track, title, link}"""
+    album = ''
+    pending = None
+    with open(links_file, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            match = ALBUM_LINE_PATTERN.match(line)
+            if match:
+                album = match.group(1)
+                continue
+            if line.startswith('http') and pending:
+                yield {'album': album, 'track': int(pending.group(1)), 'title': pending.group(2).strip(), 'link': line}
+                pending = None
+                continue
+            pending = TRACK_LINE_PATTERN.match(line)
+
+def iter_mp3tag_files(html_dir=HTML_DIR):
+    """Файлы выгрузок Mp3tag (без списков ссылок)"""
+    return [html_file for html_file in sorted(html_dir.glob('*_vlk_mp3tag.html'))
+            if not html_file.name.startswith('page_links_')]
+
+def track_key(album, title):
+    """Ключ трека для сопоставления источников: нормализованные альбом и название"""
+    return normalize_title(album), normalize_title(title)
+
+def load_track_metadata(html_dir=HTML_DIR):
+    """
+    Теги и ссылки на страницы по трекам: {(альбом, название): {track, year, genre, filename, link}}.
+    Ссылки на страницы сопоставляются по альбому и названию; если альбом назван иначе
+    ('Раннее творчество' / 'Песни 80-х') - по одному названию, затем по номеру трека в альбоме
+    """
+    metadata = {}
+    by_title = {}
+    by_number = {}
+    for html_file in iter_mp3tag_files(html_dir):
+        for row in iter_mp3tag_rows(html_file):
+            entry = {key: row.get(key) for key in ('track', 'year', 'genre', 'filename')}
+            key = track_key(row.get('album', ''), row.get('title', ''))
+            metadata[key] = entry
+            # Название, встречающееся в нескольких альбомах, по одному названию не сопоставляется
+            by_title[key[1]] = None if key[1] in by_title else entry
+            by_number[(key[0], row.get('track'))] = entry
+
+    for links_file in sorted(html_dir.glob('page_links_*.html')):
+        for page in iter_page_links(links_file):
+            key = track_key(page['album'], page['title'])
+            entry = metadata.get(key) or by_title.get(key[1]) or by_number.get((key[0], page['track']))
+            if entry is None:
+                entry = metadata[key] = {'track': page['track']}
+            entry['link'] = page['link']
+    return metadata
+
+def lookup_track(metadata, album, title):
+    """
+    Теги трека по альбому и названию. В тегах названия бывают сокращены
+    ('Под стволами' / 'Под стволами валили стволы') - тогда ищется трек альбома,
+    название которого является началом названия песни (самое длинное из таких)
+    """
+    key = track_key(album, title)
+    if key in metadata:
+        return metadata[key]
+
+    best = None
+    for (tag_album, tag_title), entry in metadata.items():
+        if tag_album == key[0] and tag_title and f"{key[1]} ".startswith(f"{tag_title} "):
+            if best is None or len(tag_title) > len(best[0]):
+                best = (tag_title, entry)
+    return best[1] if best else {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Чтение выгрузок Mp3tag и ссылок на страницы песен")
+    parser.add_argument('--html-dir', type=Path, default=HTML_DIR, help="папка выгрузок")
+    args = parser.parse_args()
+
+    for html_file in iter_mp3tag_files(args.html_dir):
+        rows = list(iter_mp3tag_rows(html_file))
+        years = sorted({row['year'] for row in rows if row.get('year')})
+        genres = sorted({row['genre'] for row in rows if row.get('genre')})
+        print(f"{html_file.name}: {len(rows)} tracks, years {years}, genres {genres}")
+
+    metadata = load_track_metadata(args.html_dir)
+    linked = sum(1 for entry in metadata.values() if entry.get('link'))
+    print(f"{'='*60}")
+    print(f"Tracks: {len(metadata)}, with page links: {linked}")
+
+if __name__ == '__main__':
+    main()
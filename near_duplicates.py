@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Поиск почти одинаковых песен (дубликатов и вариантов с правками) во всех источниках корпуса
+Для каждого стихотворения строится MinHash-подпись по словным шинглам, подписи раскладываются
+по корзинам LSH (полосы по несколько значений), и сравниваются только пары из общих корзин
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from corpus import BASE_DIR, load_corpus
+from fragment_search import distort_fragment, normalize_line
+
+DUPLICATES_FILE = BASE_DIR / 'JSON' / 'near_duplicates.json'
+
+SHINGLE_SIZE = 3
+SIGNATURE_LENGTH = 64
+BANDS = 16                       # 16 полос по 4 значения: порог около (1/16) ** (1/4) = 0.5
+MIN_JACCARD = 0.5
+DUPLICATE_JACCARD = 0.9          # выше - дубликат, ниже - вариант
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Одна хеш-функция (a*x + b) mod p для всех корзин подписи (one permutation hashing)
+HASH_A, HASH_B = 0x5DEECE66D1F3B7, 0x2F1E8C3A9B
+# Сдвиг значения, взятого из соседней корзины при заполнении пустых
+DENSIFY_OFFSET = 0x9E3779B97F4A7C1
+
+def poem_shingles(lines, size=SHINGLE_SIZE):
+    """Хеши словных шинглов текста (слова нормализованы, строки склеены)"""
+    words = [word for line in lines for word in normalize_line(line).split()]
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+def minhash_signature(shingles, length=SIGNATURE_LENGTH):
+    """
+    MinHash-подпись множества шинглов схемой one permutation hashing:
+    шингл хешируется один раз и попадает в одну из length корзин, в корзине хранится минимум.
+    Пустые корзины заполняются значением ближайшей следующей непустой (densification).
+    Вместо length хеширований на шингл - одно, оценка Жаккара та же
+    """
+    if not shingles:
+        return ()
+    prime = MERSENNE_PRIME
+    bins = [None] * length
+    for x in shingles:
+        value = (HASH_A * x + HASH_B) % prime
+        slot = value * length >> 61
+        current = bins[slot]
+        if current is None or value < current:
+            bins[slot] = value
+
+    signature = list(bins)
+    for i in range(length):
+        if bins[i] is None:
+            distance = 1
+            while bins[(i + distance) % length] is None:
+                distance += 1
+            signature[i] = bins[(i + distance) % length] + distance * DENSIFY_OFFSET
+    return tuple(signature)
+
+def _signature_job(lines):
+    shingles = poem_shingles(lines)
+    return shingles, minhash_signature(shingles)
+
+def compute_signatures(poems, max_workers=MAX_WORKERS):
+    """Шинглы и подписи всех стихотворений (в пуле процессов для больших корпусов)"""
+    texts = [poem['text'] for poem in poems]
+    if max_workers <= 1 or len(texts) < 1000:
+        return [_signature_job(text) for text in texts]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_signature_job, texts, chunksize=256))
+
+def lsh_candidates(signatures, bands=BANDS):
+    """Пары номеров стихотворений, совпавших хотя бы в одной полосе подписи"""
+    candidates = set()
+    if not signatures:
+        return candidates
+
+    length = max(len(signature) for signature in signatures)
+    rows = length // bands
+    for band in range(bands):
+        buckets = {}
+        start = band * rows
+        for index, signature in enumerate(signatures):
+            if signature:
+                buckets.setdefault(signature[start:start + rows], []).append(index)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    candidates.add((first, second))
+    return candidates
+
+def estimate_jaccard(first, second):
+    """Оценка сходства Жаккара по доле совпавших значений подписей"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+def score_candidates(poems, computed, candidates, min_jaccard=MIN_JACCARD):
+    """
+    Пары похожих стихотворений среди кандидатов LSH: [{first, second, estimate, jaccard, kind}].
+    Точное значение Жаккара по шинглам считается только для кандидатов с близкой оценкой
+    """
+    pairs = []
+    for first, second in candidates:
+        (first_shingles, first_signature), (second_shingles, second_signature) = computed[first], computed[second]
+        estimate = estimate_jaccard(first_signature, second_signature)
+        if estimate < min_jaccard - 0.1:
+            continue
+        union = len(first_shingles | second_shingles)
+        jaccard = len(first_shingles & second_shingles) / union if union else 0.0
+        if jaccard < min_jaccard:
+            continue
+        pairs.append({
+            'first': poems[first]['id'],
+            'second': poems[second]['id'],
+            'titles': [poems[first]['title'], poems[second]['title']],
+            'estimate': round(estimate, 3),
+            'jaccard': round(jaccard, 3),
+            'kind': 'duplicate' if jaccard >= DUPLICATE_JACCARD else 'variant'
+        })
+
+    pairs.sort(key=lambda pair: (-pair['jaccard'], pair['first'], pair['second']))
+    return pairs
+
+def find_near_duplicates(poems, min_jaccard=MIN_JACCARD, bands=BANDS, max_workers=MAX_WORKERS):
+    """Дубликаты и варианты в корпусе без попарного сравнения всех стихотворений"""
+    computed = compute_signatures(poems, max_workers)
+    candidates = lsh_candidates([signature for _, signature in computed], bands)
+    return score_candidates(poems, computed, candidates, min_jaccard)
+
+def synthetic_corpus(poems, count, variant_rate=0.01, seed=1):
+    """
+    Корпус для бенчмарка: стихотворения из случайных строк исходного корпуса
+    и небольшая доля вариантов с искаженными строками. Возвращает (стихотворения, пары вариантов)
+    """
+    rng = random.Random(seed)
+    all_lines = [line for poem in poems for line in poem['text'] if line]
+
+    synthetic = []
+    planted = set()
+    for index in range(count):
+        if synthetic and rng.random() < variant_rate:
+            original = rng.randrange(len(synthetic))
+            text = [distort_fragment(line, rng) if rng.random() < 0.15 else line
+                    for line in synthetic[original]['text']]
+            planted.add((synthetic[original]['id'], f"synthetic/{index}"))
+        else:
+            text = [rng.choice(all_lines) for _ in range(rng.randint(12, 32))]
+        synthetic.append({'id': f"synthetic/{index}", 'source': 'synthetic', 'title': text[0], 'text': text})
+    return synthetic, planted
+
+def run_benchmark(poems, count, max_workers):
+    """Время и полнота поиска на синтетическом корпусе с заранее известными вариантами"""
+    synthetic, planted = synthetic_corpus(poems, count)
+
+    start = time.perf_counter()
+    computed = compute_signatures(synthetic, max_workers)
+    signature_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidates = lsh_candidates([signature for _, signature in computed])
+    lsh_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = score_candidates(synthetic, computed, candidates)
+    score_seconds = time.perf_counter() - start
+    found = {(pair['first'], pair['second']) for pair in pairs}
+    recall = len(planted & found) / len(planted) if planted else 1.0
+
+    all_pairs = count * (count - 1) // 2
+    print(f"{'='*60}")
+    print(f"Poems: {count}, planted variants: {len(planted)}")
+    print(f"  Signatures:       {signature_seconds:8.2f} s")
+    print(f"  LSH buckets:      {lsh_seconds:8.2f} s")
+    print(f"  Scoring:          {score_seconds:8.2f} s")
+    print(f"  Candidate pairs:  {len(candidates)} of {all_pairs} ({len(candidates) / max(1, all_pairs):.2e})")
+    print(f"  Reported pairs:   {len(pairs)}, planted recall: {recall:.1%}")
+    print(f"{'='*60}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск дубликатов и вариантов песен (MinHash/LSH)")
+    parser.add_argument('--min-jaccard', type=float, default=MIN_JACCARD, help="минимальное сходство пары")
+    parser.add_argument('--output', type=Path, default=DUPLICATES_FILE, help="файл результатов")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="число процессов")
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help="бенчмарк на синтетическом корпусе из N стихотворений")
+    args = parser.parse_args()
+
+    poems = load_corpus()
+
+    if args.benchmark:
+        run_benchmark(poems, args.benchmark, args.workers)
+        return
+
+    start = time.perf_counter()
+    pairs = find_near_duplicates(poems, args.min_jaccard, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(pairs, f, ensure_ascii=False, indent=2)
+
+    print(f"{'='*60}")
+    for pair in pairs:
+        print(f"  {pair['jaccard']:.3f} ({pair['estimate']:.3f}) {pair['kind']:9} "
+              f"{pair['first']} ~ {pair['second']}")
+    print(f"{'='*60}")
+    print(f"Poems: {len(poems)}, pairs: {len(pairs)}, time: {elapsed:.2f}s")
+    print(f"✓ Saved {args.output}")
+
+if __name__ == '__main__':
+    main()
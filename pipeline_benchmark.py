@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк конвейера на синтетических данных (synthetic_data.py)
+Замеряется каждая стадия: разбор HTML, транслитерация, поиск ссылок в ssilki, запись TXT/JSON,
+сборка JSON плеера и извлечение текстов из .docx. Результаты дописываются в JSON/benchmark_results.json
+вместе с коммитом, чтобы сравнивать производительность между коммитами
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import profiling
+from create_all_files import (create_txt_and_json_files, get_audio_link, parse_html_with_stanzas,
+                              transliterate_title)
+from create_volkov_player_json import VOLKOV, transliterate_simple, write_player_json
+from extract_text_from_docs import MAX_WORKERS, extract_documents
+from synthetic_data import generate_dataset
+from verified_texts import load_verified_texts, match_verified
+
+BASE_DIR = Path('/home/user/VLK')
+RESULTS_FILE = BASE_DIR / 'JSON' / 'benchmark_results.json'
+
+STAGES = ('generate', 'parse', 'transliterate', 'link_resolution', 'writes', 'player_json', 'extraction')
+
+def git_commit(repo_dir=BASE_DIR):
+    """Короткий хеш текущего коммита (с '+' при незакоммиченных изменениях) или None"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+' if dirty else '')
+
+class BenchmarkRun:
+    """Состояние одного прогона: рабочая папка, данные предыдущих стадий и замеры"""
+
+    def __init__(self, work_dir, count, documents):
+        self.work_dir = Path(work_dir)
+        self.count = count
+        self.documents = documents
+        self.dataset = None
+        self.poems = None
+        self.stages = {}
+
+    def measure(self, name, function, items):
+        """Выполняет стадию с подавленным выводом скриптов и записывает время"""
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), profiling.stage(f"benchmark_{name}", items=items):
+            result = function()
+        seconds = time.perf_counter() - start
+        self.stages[name] = {
+            'seconds': round(seconds, 4),
+            'items': items,
+            'ms_per_item': round(seconds * 1000 / items, 4) if items else None
+        }
+        return result
+
+    def stage_generate(self):
+        self.dataset = self.measure(
+            'generate', lambda: generate_dataset(self.work_dir, self.count, self.documents), self.count)
+
+    def stage_parse(self):
+        def parse():
+            with open(self.dataset['html_file'], 'r', encoding='utf-8') as f:
+                return parse_html_with_stanzas(f.read())
+        self.poems = self.measure('parse', parse, self.count)
+        self.stages['parse']['parsed'] = len(self.poems)
+
+        # Разобранные песни должны совпасть со сгенерированными, иначе замеры дальше идут по другим данным
+        expected = [(poem['album'], poem['track'], poem['title'], poem['text']) for poem in self.dataset['poems']]
+        parsed = [(poem['album'], poem['track'], poem['title'], poem['text']) for poem in self.poems]
+        if parsed != expected:
+            mismatched = sum(1 for got, want in zip(parsed, expected) if got != want)
+            raise RuntimeError(f"Parsed songs differ from generated: {len(parsed)} parsed of {len(expected)}, "
+                               f"{mismatched} mismatched")
+
+    def stage_transliterate(self):
+        titles = [poem['title'] for poem in self.dataset['poems']]
+
+        def transliterate():
+            for title in titles:
+                transliterate_title(title)
+                transliterate_simple(title)
+        self.measure('transliterate', transliterate, len(titles))
+
+    def stage_link_resolution(self):
+        poems = self.dataset['poems']
+        ssilki_root = self.dataset['ssilki_root']
+
+        def resolve():
+            return [get_audio_link(poem['album'], poem['track'], poem['title'], ssilki_root) for poem in poems]
+        self.measure('link_resolution', resolve, len(poems))
+
+    def stage_writes(self):
+        poems = self.poems or self.dataset['poems']
+        self.measure('writes', lambda: create_txt_and_json_files(
+            poems, self.work_dir / 'STIHI_VOLKOV', self.dataset['ssilki_root']), len(poems))
+
+    def stage_player_json(self):
+        stihi_dir = self.work_dir / 'STIHI_VOLKOV'
+        if not stihi_dir.exists():
+            self.stage_writes()
+
+        albums = sorted({int(cd_dir.name[2:]) for cd_dir in stihi_dir.glob('CD*')})
+        author = dict(VOLKOV, mp3tagDir=None, albums=[{
+            'number': number,
+            'name': f"Синтетический альбом {number}",
+            'ordinal': '',
+            'year': '',
+            'dir': str(stihi_dir / f"CD{number}"),
+            'avatar': f"img/album{number}.jpg"
+        } for number in albums])
+        output_file = self.work_dir / 'content.json'
+        album_stats = self.measure('player_json', lambda: write_player_json([output_file], author),
+                                   len(self.poems or self.dataset['poems']))
+        self.stages['player_json']['bytes'] = output_file.stat().st_size
+        self.stages['player_json']['tracks'] = sum(count for _, count in album_stats)
+
+    def stage_extraction(self):
+        doc_files = self.dataset['doc_files']
+        text_dir = self.dataset['text_dir']
+
+        def extract():
+            results = extract_documents(doc_files)
+            verified = load_verified_texts(text_dir)
+            for doc_file in doc_files:
+                match_verified(doc_file.name, verified)
+            return results
+        results = self.measure('extraction', extract, len(doc_files))
+        self.stages['extraction']['failed'] = sum(1 for lines, _ in results.values() if not lines)
+        self.stages['extraction']['workers'] = MAX_WORKERS
+
+def run_benchmark(count, documents=None, stages=STAGES, work_dir=None):
+    """Прогон выбранных стадий (generate выполняется всегда), возвращает запись результатов"""
+    # Временная папка нужна, только если рабочая не задана
+    if work_dir is None:
+        work_context = tempfile.TemporaryDirectory(prefix='vlk_benchmark_')
+    else:
+        work_context = contextlib.nullcontext(work_dir)
+    with work_context as run_dir:
+        run = BenchmarkRun(run_dir, count, documents)
+        run.stage_generate()
+        for stage in STAGES[1:]:
+            if stage in stages:
+                getattr(run, f"stage_{stage}")()
+
+    return {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'count': count,
+        'documents': len(run.dataset['doc_files']),
+        'stages': run.stages
+    }
+
+def load_results(results_file=RESULTS_FILE):
+    if not results_file.exists():
+        return []
+    with open(results_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def previous_run(results, record):
+    """Последний сохраненный прогон того же масштаба для сравнения"""
+    for old in reversed(results):
+        if old['count'] == record['count'] and old['documents'] == record['documents']:
+            return old
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк стадий конвейера на синтетических данных")
+    parser.add_argument('--count', type=int, default=1000, help="число синтетических песен (1000-100000)")
+    parser.add_argument('--documents', type=int, default=None,
+                        help="число .docx для извлечения (по умолчанию - все песни)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES[1:], default=list(STAGES[1:]),
+                        help="стадии для замера")
+    parser.add_argument('--work-dir', type=Path, default=None,
+                        help="папка для данных (по умолчанию временная, удаляется)")
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE, help="файл результатов")
+    parser.add_argument('--no-save', action='store_true', help="не сохранять результаты")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args, 'pipeline_benchmark')
+
+    record = run_benchmark(args.count, args.documents, args.stages, args.work_dir)
+    results = load_results(args.output)
+    old = previous_run(results, record)
+
+    print(f"{'='*60}")
+    print(f"Poems: {record['count']}, documents: {record['documents']}, commit: {record['commit']}")
+    if old:
+        print(f"Compared with {old['commit']} ({old['date']})")
+    for name, stage in record['stages'].items():
+        line = f"  {name:16} {stage['seconds']:9.3f} s  {stage['ms_per_item'] or 0:9.3f} ms/item"
+        if old and name in old['stages'] and old['stages'][name]['seconds']:
+            change = stage['seconds'] / old['stages'][name]['seconds'] - 1
+            line += f"  {change:+7.1%}"
+        print(line)
+    print(f"{'='*60}")
+
+    if not args.no_save:
+        results.append(record)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✓ Saved {args.output}")
+    profiling.finish()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Профилирование стадий скриптов: время стадий и отдельных элементов, счетчики
+(прочитано/записано/пропущено файлов, байты) и, по желанию, пики памяти tracemalloc.
+По флагу --profile пишется JSON в формате Chrome trace events (chrome://tracing, Perfetto).
+Пока профилирование не включено, stage()/item() возвращают общий пустой контекст,
+а count() сразу выходит - накладные расходы на вызов функции
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+NULL_SPAN = contextlib.nullcontext()
+
+_profiler = None
+
+class Profiler:
+    """Собирает события трассировки; время - микросекунды perf_counter (общий для процессов часовой источник)"""
+
+    def __init__(self, trace_file, memory=False):
+        self.trace_file = Path(trace_file)
+        self.memory = memory
+        self.pid = os.getpid()
+        self.events = []
+        self.counters = {}
+        self.stage_totals = {}
+        self._stack = []
+        self._lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def now():
+        return time.perf_counter_ns() // 1000
+
+    def add_span(self, name, category, start, duration, pid=None, tid=None, **args):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start,
+            "dur": duration,
+            "pid": pid or self.pid,
+            "tid": tid or threading.get_ident()
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        # Пик памяти вложенной стадии учитывается и во внешней (reset_peak сбрасывает общий пик)
+        frame = {'child_peak': 0}
+        if self.memory:
+            if self._stack:
+                self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+
+        start = self.now()
+        try:
+            yield
+        finally:
+            duration = self.now() - start
+            self._stack.pop()
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+                args['memory_peak'] = peak
+                if self._stack:
+                    self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+            self.add_span(name, category, start, duration, **args)
+            if category == 'stage':
+                self.stage_totals[name] = self.stage_totals.get(name, 0) + duration
+                self.sample_counters()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample_counters(self):
+        """Текущие значения счетчиков - отдельный график в трассировке"""
+        if self.counters:
+            with self._lock:
+                self.events.append({"name": "counters", "ph": "C", "ts": self.now(), "pid": self.pid,
+                                    "args": dict(self.counters)})
+
+    def write(self):
+        self.sample_counters()
+        trace = {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "counters": self.counters,
+                "stages_ms": {name: round(total / 1000, 3) for name, total in self.stage_totals.items()}
+            }
+        }
+        with open(self.trace_file, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False)
+        return self.trace_file
+
+def enable(trace_file, memory=False):
+    """Включает профилирование в текущем процессе"""
+    global _profiler
+    _profiler = Profiler(trace_file, memory)
+    return _profiler
+
+def enabled():
+    return _profiler is not None
+
+def stage(name, **args):
+    """Контекст стадии скрипта"""
+    if _profiler is None:
+        return NULL_SPAN
+    return _profiler.span(name, 'stage', **args)
+
+def item(name, **args):
+    """Контекст обработки одного элемента (файла, песни)"""
+    if _profiler is None:
+        return NULL_SPAN
+    return _profiler.span(name, 'item', **args)
+
+def add_span(name, start, duration, pid=None, **args):
+    """Элемент, замеренный в другом процессе: start и duration в секундах perf_counter"""
+    if _profiler is not None:
+        _profiler.add_span(name, 'item', int(start * 1_000_000), int(duration * 1_000_000),
+                           pid=pid, tid=pid, **args)
+
+def count(name, value=1):
+    """Увеличивает счетчик (files_read, files_written, files_skipped, bytes_read, bytes_written...)"""
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+def profiled(name):
+    """Декоратор: вызов функции - стадия name"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return function(*args, **kwargs)
+            with _profiler.span(name, 'stage'):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def add_profile_arguments(parser):
+    """Флаги --profile [файл] и --profile-memory для argparse"""
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='TRACE',
+                        help="записать трассировку Chrome (по умолчанию <скрипт>.trace.json)")
+    parser.add_argument('--profile-memory', action='store_true', help="добавить пики памяти tracemalloc")
+
+def start_from_args(args, script_name):
+    """Включает профилирование по аргументам командной строки"""
+    if args.profile is None:
+        return None
+    return enable(args.profile or f"{script_name}.trace.json", args.profile_memory)
+
+def finish():
+    """Записывает трассировку и печатает итоги стадий"""
+    if _profiler is None:
+        return None
+    trace_file = _profiler.write()
+    print(f"{'='*60}")
+    print("Profile:")
+    for name, total in _profiler.stage_totals.items():
+        print(f"  {name:32} {total / 1000:10.1f} ms")
+    for name, value in sorted(_profiler.counters.items()):
+        print(f"  {name:32} {value:10}")
+    print(f"✓ Saved {trace_file}")
+    return trace_file
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Статистика стихосложения по всему корпусу: слоги в строках (по гласным), длины строк,
+размеры строф и угадывание схемы рифмовки. Все строки корпуса упаковываются в плоские массивы
+со смещениями стихотворений и строф, статистика считается векторно (NumPy, если установлен).
+Для каждого стихотворения вычисляется оценка аномальности: строфа из 9 строк среди четверостиший
+обычно означает потерянный разрыв строфы при извлечении
+"""
+
+import argparse
+import csv
+import json
+import math
+import re
+import time
+from pathlib import Path
+
+from corpus import BASE_DIR, load_corpus
+from rhyme_index import rhyme_scheme
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+REPORT_JSON = BASE_DIR / 'JSON' / 'prosody_report.json'
+REPORT_CSV = BASE_DIR / 'JSON' / 'prosody_report.csv'
+
+VOWELS = 'аеёиоуыэюяАЕЁИОУЫЭЮЯ'
+VOWEL_PATTERN = re.compile(f'[{VOWELS}]')
+
+# Строка длиннее среднего по стихотворению на столько стандартных отклонений - выброс
+SYLLABLE_Z_LIMIT = 2.5
+# Флаги аномалий
+LONG_STANZA_FACTOR = 2        # строфа в 2+ раза длиннее типичной
+SINGLE_STANZA_LINES = 12      # столько строк без единого разрыва строфы
+
+class CorpusArrays:
+    """
+    Плоское представление корпуса:
+    lines - непустые строки подряд, poem_offsets - начало строк каждого стихотворения (+ конец),
+    stanza_offsets - начало строк каждой строфы (+ конец), poem_stanzas - начало строф стихотворения (+ конец)
+    """
+
+    def __init__(self, poems):
+        self.poems = []
+        self.lines = []
+        self.poem_offsets = [0]
+        self.stanza_offsets = [0]
+        self.poem_stanzas = [0]
+
+        for poem in poems:
+            stanza_open = False
+            start = len(self.lines)
+            for line in poem['text']:
+                if line.strip():
+                    self.lines.append(line)
+                    stanza_open = True
+                elif stanza_open:
+                    self.stanza_offsets.append(len(self.lines))
+                    stanza_open = False
+            if len(self.lines) == start:
+                continue
+            if stanza_open:
+                self.stanza_offsets.append(len(self.lines))
+            self.poems.append(poem)
+            self.poem_offsets.append(len(self.lines))
+            self.poem_stanzas.append(len(self.stanza_offsets) - 1)
+
+def count_syllables(lines):
+    """Число гласных (слогов) и длина каждой строки"""
+    if not HAS_NUMPY:
+        return ([len(VOWEL_PATTERN.findall(line)) for line in lines], [len(line) for line in lines])
+
+    text = '\n'.join(lines)
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    is_vowel = np.isin(codes, np.array([ord(ch) for ch in VOWELS], dtype=np.uint32))
+    lengths = np.fromiter((len(line) for line in lines), dtype=np.int64, count=len(lines))
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    return np.add.reduceat(is_vowel.astype(np.int64), starts), lengths
+
+def segment_sums(values, offsets):
+    """Суммы значений по сегментам [offsets[i], offsets[i+1]) (сегменты непустые)"""
+    if HAS_NUMPY:
+        return np.add.reduceat(np.asarray(values, dtype=np.float64), np.asarray(offsets[:-1]))
+    return [sum(values[a:b]) for a, b in zip(offsets, offsets[1:])]
+
+def poem_syllable_stats(syllables, poem_offsets):
+    """Среднее и стандартное отклонение слогов по стихотворениям, z-оценки строк"""
+    if HAS_NUMPY:
+        offsets = np.asarray(poem_offsets)
+        counts = np.diff(offsets)
+        syllables = np.asarray(syllables, dtype=np.float64)
+        means = segment_sums(syllables, poem_offsets) / counts
+        variances = segment_sums(syllables * syllables, poem_offsets) / counts - means * means
+        stds = np.sqrt(np.maximum(variances, 0.0))
+        line_poem = np.repeat(np.arange(len(counts)), counts)
+        z_scores = (syllables - means[line_poem]) / np.where(stds[line_poem] > 0, stds[line_poem], 1.0)
+        return means, stds, z_scores
+
+    means, stds, z_scores = [], [], []
+    for a, b in zip(poem_offsets, poem_offsets[1:]):
+        values = syllables[a:b]
+        mean = sum(values) / len(values)
+        std = math.sqrt(max(sum(v * v for v in values) / len(values) - mean * mean, 0.0))
+        means.append(mean)
+        stds.append(std)
+        z_scores.extend((v - mean) / (std or 1.0) for v in values)
+    return means, stds, z_scores
+
+def analyze_corpus(poems):
+    """Статистика и оценки аномальности для каждого стихотворения: список записей отчета"""
+    arrays = CorpusArrays(poems)
+    syllables, lengths = count_syllables(arrays.lines)
+    means, stds, z_scores = poem_syllable_stats(syllables, arrays.poem_offsets)
+    mean_lengths = segment_sums(lengths, arrays.poem_offsets)
+
+    if HAS_NUMPY:
+        stanza_sizes = np.diff(np.asarray(arrays.stanza_offsets)).tolist()
+        outliers = segment_sums((np.abs(z_scores) > SYLLABLE_Z_LIMIT).astype(np.float64), arrays.poem_offsets)
+    else:
+        stanza_sizes = [b - a for a, b in zip(arrays.stanza_offsets, arrays.stanza_offsets[1:])]
+        outliers = segment_sums([1 if abs(z) > SYLLABLE_Z_LIMIT else 0 for z in z_scores], arrays.poem_offsets)
+
+    report = []
+    for index, poem in enumerate(arrays.poems):
+        first_line, last_line = arrays.poem_offsets[index], arrays.poem_offsets[index + 1]
+        first_stanza, last_stanza = arrays.poem_stanzas[index], arrays.poem_stanzas[index + 1]
+        line_count = last_line - first_line
+        sizes = stanza_sizes[first_stanza:last_stanza]
+
+        # Типичный размер строфы - самый частый (при равенстве меньший)
+        typical = min(set(sizes), key=lambda size: (-sizes.count(size), size))
+        flags = []
+        if len(sizes) > 1 and max(sizes) >= LONG_STANZA_FACTOR * typical:
+            flags.append('long_stanza')
+        if len(sizes) == 1 and line_count >= SINGLE_STANZA_LINES:
+            flags.append('no_stanza_breaks')
+        if outliers[index]:
+            flags.append('syllable_outliers')
+
+        stanza_deviation = max(abs(size - typical) for size in sizes) / typical
+        score = (stanza_deviation
+                 + (1.0 if 'no_stanza_breaks' in flags else 0.0)
+                 + float(outliers[index]) / line_count * 4)
+
+        schemes = [rhyme_scheme(arrays.lines[arrays.stanza_offsets[s]:arrays.stanza_offsets[s + 1]])
+                   for s in range(first_stanza, last_stanza)]
+
+        report.append({
+            'id': poem['id'],
+            'source': poem['source'],
+            'title': poem['title'],
+            'lines': line_count,
+            'stanzas': len(sizes),
+            'stanza_sizes': sizes,
+            'mean_syllables': round(float(means[index]), 2),
+            'std_syllables': round(float(stds[index]), 2),
+            'mean_length': round(float(mean_lengths[index]) / line_count, 1),
+            'rhyme_schemes': schemes,
+            'anomaly_score': round(score, 3),
+            'flags': flags
+        })
+
+    report.sort(key=lambda item: (-item['anomaly_score'], item['id']))
+    return report
+
+def write_csv(report, csv_file):
+    """CSV отчет: одна строка на стихотворение, списки через пробел"""
+    fields = ['id', 'source', 'title', 'lines', 'stanzas', 'stanza_sizes', 'mean_syllables',
+              'std_syllables', 'mean_length', 'rhyme_schemes', 'anomaly_score', 'flags']
+    with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for item in report:
+            row = dict(item)
+            row['stanza_sizes'] = ' '.join(str(size) for size in item['stanza_sizes'])
+            row['rhyme_schemes'] = ' '.join(item['rhyme_schemes'])
+            row['flags'] = ' '.join(item['flags'])
+            writer.writerow(row)
+
+def main():
+    parser = argparse.ArgumentParser(description="Статистика стихосложения и поиск ошибок извлечения")
+    parser.add_argument('--json', type=Path, default=REPORT_JSON, help="JSON отчет")
+    parser.add_argument('--csv', type=Path, default=REPORT_CSV, help="CSV отчет")
+    parser.add_argument('--top', type=int, default=15, help="сколько самых аномальных показать")
+    args = parser.parse_args()
+
+    poems = load_corpus()
+
+    start = time.perf_counter()
+    report = analyze_corpus(poems)
+    elapsed = time.perf_counter() - start
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    write_csv(report, args.csv)
+
+    print(f"{'='*60}")
+    print(f"Most anomalous poems:")
+    for item in report[:args.top]:
+        print(f"  {item['anomaly_score']:6.2f}  {item['id']:45} stanzas {item['stanza_sizes']}  {' '.join(item['flags'])}")
+    print(f"{'='*60}")
+    print(f"Poems: {len(report)}, lines: {sum(item['lines'] for item in report)}, "
+          f"time: {elapsed * 1000:.1f} ms ({'numpy' if HAS_NUMPY else 'pure Python'})")
+    print(f"✓ Saved {args.json}")
+    print(f"✓ Saved {args.csv}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Индекс рифм по окончаниям строк песен альбомов
+Для последнего слова каждой строки строится фонетический ключ окончания (область ударного слога
+без словаря ударений, ё/е и парные гласные сведены, конечные звонкие оглушены); ключ -> строки.
+Поиск рифм к слову и определение схемы рифмовки строфы - обращения к словарю вместо перебора.
+Индекс сохраняется рядом с корпусом: STIHI_VOLKOV/rhyme_index.json вместе с отпечатком
+JSON песен (имена и sha256); при изменении песен индекс перестраивается
+"""
+
+import argparse
+import hashlib
+import json
+import re
+
+from corpus import ALBUMS_DIR, iter_album_poems
+
+RHYME_INDEX_FILE = ALBUMS_DIR / 'rhyme_index.json'
+RHYME_INDEX_VERSION = 2
+
+VOWELS = 'аеёиоуыэюя'
+LAST_WORD_PATTERN = re.compile(r'([а-яё]+)[^а-яё]*$')
+
+# Гласные, которые в окончаниях рифмуются между собой: ё/е, йотированные и ы/и
+VOWEL_FOLDING = str.maketrans({'ё': 'е', 'э': 'е', 'я': 'а', 'ю': 'у', 'ы': 'и'})
+# Оглушение звонких согласных на конце слова
+DEVOICING = {'б': 'п', 'в': 'ф', 'г': 'к', 'д': 'т', 'ж': 'ш', 'з': 'с'}
+
+def last_word(line):
+    """Последнее слово строки в нижнем регистре или пустая строка"""
+    match = LAST_WORD_PATTERN.search(line.lower())
+    return match.group(1) if match else ''
+
+def rhyme_key(text):
+    """
+    Фонетический ключ окончания последнего слова строки (или самого слова).
+    Слово на согласную - от последней гласной (мужская рифма), на гласную -
+    от предпоследней (женская рифма: руки/звуки); мягкий и твердый знаки отбрасываются
+    """
+    word = last_word(text).replace('ь', '').replace('ъ', '')
+    if not word:
+        return ''
+
+    positions = [i for i, ch in enumerate(word) if ch in VOWELS]
+    if not positions:
+        return word
+    if word[-1] in VOWELS and len(positions) > 1:
+        start = positions[-2]
+    else:
+        start = positions[-1]
+        # Открытый односложный конец: добавляем предшествующую согласную (моя/твоя)
+        if start == len(word) - 1 and start > 0:
+            start -= 1
+
+    ending = word[start:].translate(VOWEL_FOLDING)
+    if ending[-1] in DEVOICING:
+        ending = ending[:-1] + DEVOICING[ending[-1]]
+    return ending
+
+def rhyme_scheme(lines, key=rhyme_key):
+    """Схема рифмовки строфы буквами (ABAB, AABB); строки без пары обозначаются 'x'"""
+    keys = [key(line) for line in lines]
+    counts = {}
+    for line_key in keys:
+        counts[line_key] = counts.get(line_key, 0) + 1
+
+    letters = {}
+    scheme = []
+    for line_key in keys:
+        if not line_key or counts[line_key] < 2:
+            scheme.append('x')
+            continue
+        if line_key not in letters:
+            letters[line_key] = chr(ord('A') + len(letters)) if len(letters) < 26 else '?'
+        scheme.append(letters[line_key])
+    return ''.join(scheme)
+
+def album_sources_fingerprint(albums_dir=ALBUMS_DIR):
+    """sha256 по именам и содержимому JSON песен альбомов, из которых строится индекс"""
+    digest = hashlib.sha256()
+    for json_file in sorted(albums_dir.glob('CD*/*.json')):
+        digest.update(json_file.relative_to(albums_dir).as_posix().encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(hashlib.sha256(json_file.read_bytes()).digest())
+    return digest.hexdigest()
+
+class RhymeIndex:
+    """Ключ окончания -> номера строк; строки хранятся как (id стихотворения, номер строки, текст)"""
+
+    def __init__(self, lines, keys, sources=None):
+        self.lines = lines
+        self.keys = keys
+        self.sources = sources
+
+    @classmethod
+    def build(cls, poems, sources=None):
+        lines = []
+        keys = {}
+        for poem in poems:
+            for line_no, line in enumerate(poem['text']):
+                key = rhyme_key(line)
+                if not key:
+                    continue
+                keys.setdefault(key, []).append(len(lines))
+                lines.append((poem['id'], line_no, line))
+        return cls(lines, keys, sources)
+
+    def save(self, index_file=RHYME_INDEX_FILE):
+        data = {
+            "version": RHYME_INDEX_VERSION,
+            "sources": self.sources,
+            "lines": [list(line) for line in self.lines],
+            "keys": dict(sorted(self.keys.items()))
+        }
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, index_file=RHYME_INDEX_FILE):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != RHYME_INDEX_VERSION:
+            raise ValueError(f"Unsupported rhyme index version: {data.get('version')}")
+        return cls([tuple(line) for line in data['lines']], data['keys'], data.get('sources'))
+
+    def rhymes_for(self, text, limit=None):
+        """Строки, рифмующиеся с последним словом text (кроме строк с тем же словом)"""
+        word = last_word(text)
+        found = []
+        for line_index in self.keys.get(rhyme_key(text), ()):
+            line = self.lines[line_index]
+            if last_word(line[2]) != word:
+                found.append(line)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    def rhyme_groups(self, min_size=2):
+        """Ключи окончаний с числом строк, самые частые первыми"""
+        groups = [(len(line_indexes), key) for key, line_indexes in self.keys.items() if len(line_indexes) >= min_size]
+        return sorted(groups, reverse=True)
+
+def build_rhyme_index(index_file=RHYME_INDEX_FILE, albums_dir=ALBUMS_DIR):
+    """Строит индекс по JSON песен альбомов и сохраняет его с отпечатком источников"""
+    index = RhymeIndex.build(iter_album_poems(albums_dir), album_sources_fingerprint(albums_dir))
+    index.save(index_file)
+    return index
+
+def load_rhyme_index(index_file=RHYME_INDEX_FILE, albums_dir=ALBUMS_DIR):
+    """
+    Загружает сохраненный индекс; если его нет, он старого формата или JSON песен
+    изменились после построения - перестраивает
+    """
+    if index_file.exists():
+        try:
+            index = RhymeIndex.load(index_file)
+        except ValueError:
+            index = None
+        if index is not None and index.sources == album_sources_fingerprint(albums_dir):
+            return index
+    return build_rhyme_index(index_file, albums_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Индекс рифм песен альбомов")
+    parser.add_argument('text', nargs='?', help="слово или строка, к которой искать рифмы")
+    parser.add_argument('--build', action='store_true', help="перестроить индекс по JSON песен")
+    parser.add_argument('--limit', type=int, default=20, help="число найденных строк")
+    args = parser.parse_args()
+
+    if args.build:
+        index = build_rhyme_index()
+        print(f"✓ Saved {RHYME_INDEX_FILE}: {len(index.lines)} lines, {len(index.keys)} endings")
+    else:
+        index = load_rhyme_index()
+
+    if args.text:
+        print(f"Rhymes for '{last_word(args.text)}' (key '{rhyme_key(args.text)}'):")
+        for poem_id, line_no, line in index.rhymes_for(args.text, args.limit):
+            print(f"  {line}  [{poem_id}:{line_no + 1}]")
+    elif not args.build:
+        print("Most common endings:")
+        for count, key in index.rhyme_groups()[:args.limit]:
+            print(f"  {count:4}  -{key}")
+
+if __name__ == '__main__':
+    main()
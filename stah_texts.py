@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тексты песен Станислава Андрейчика из V-VOLKOV/STAH_JSON
+Имена файлов закодированы как '#U041a#U0430...' (копия с расшифрованными именами - в PRIMER/),
+файлы начинаются с BOM, название отбито табуляцией (иногда после пустых строк).
+После текста идет набранная вручную запись плеера {"title", "link", "text"} - из нее берутся
+короткое название и настоящая ссылка на страницу песни; JSON в записях часто невалиден
+(пропущены запятые, кавычки «»), поэтому поля ищутся регулярным выражением
+"""
+
+import codecs
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from verified_texts import normalize_title
+
+STAH_DIR = Path('/home/user/VLK/V-VOLKOV/STAH_JSON')
+
+ESCAPE_PATTERN = re.compile(r'#U([0-9a-fA-F]{4})')
+NUMBER_PATTERN = re.compile(r'^(\d+)\.\s*')
+RECORD_FIELD_PATTERN = re.compile(r'"(title|link)"\s*:\s*["«]([^"»]*)["»]')
+
+CHUNK_SIZE = 64 * 1024
+MAX_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+def decode_filename(name):
+    """Расшифровывает '#UXXXX' в имени файла: '06. #U041a#U0430...txt' -> '06. Камень.txt'"""
+    return ESCAPE_PATTERN.sub(lambda match: chr(int(match.group(1), 16)), name)
+
+def iter_decoded_lines(filepath, chunk_size=CHUNK_SIZE):
+    """Строки файла UTF-8 без концов строк; BOM удаляется по мере чтения (в том числе внутри склеенных файлов)"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    tail = ''
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            text = decoder.decode(chunk, final=not chunk).replace('\ufeff', '')
+            lines = (tail + text).split('\n')
+            tail = lines.pop()
+            for line in lines:
+                yield line.rstrip('\r')
+            if not chunk:
+                break
+    if tail:
+        yield tail.rstrip('\r')
+
+def parse_stah_text(lines):
+    """
+    Разбирает строки файла: (заголовок, текст, поля записи плеера).
+    Текст - строки до записи ('{' или '[' в отдельной строке),
+    пробелы обрезаны, пустые строки между строфами схлопнуты
+    """
+    heading = ''
+    text = []
+    record = []
+    in_record = False
+    for line in lines:
+        stripped = line.strip()
+        if in_record:
+            record.append(stripped)
+        elif stripped in ('{', '['):
+            in_record = True
+        elif not heading:
+            heading = stripped
+        elif stripped:
+            text.append(stripped)
+        elif text and text[-1] != "":
+            text.append("")
+
+    while text and text[-1] == "":
+        text.pop()
+    return heading, text, dict(RECORD_FIELD_PATTERN.findall('\n'.join(record)))
+
+def parse_stah_file(filepath):
+    """Песня из файла STAH_JSON: {number, file, title, heading, text, link, source_file}"""
+    filepath = Path(filepath)
+    name = decode_filename(filepath.name)
+    heading, text, record = parse_stah_text(iter_decoded_lines(filepath))
+
+    # Короткое название из записи плеера, если оно отличается не только пунктуацией
+    title = heading
+    if record.get('title') and normalize_title(record['title']) != normalize_title(heading):
+        title = record['title']
+
+    number = NUMBER_PATTERN.match(name)
+    return {
+        'number': int(number.group(1)) if number else None,
+        'file': name,
+        'title': title,
+        'heading': heading,
+        'text': text,
+        'link': record.get('link', ''),
+        'source_file': filepath.name
+    }
+
+def load_stah_texts(stah_dir=STAH_DIR, max_workers=MAX_WORKERS):
+    """Все песни папки (в пуле потоков), файлы без текста пропускаются"""
+    files = sorted(Path(stah_dir).glob('*.txt'))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        songs = list(pool.map(parse_stah_file, files))
+    return [song for song in songs if song['text']]
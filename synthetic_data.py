@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Синтетические исходные данные конвейера в масштабе 1k-100k песен
+Песни собираются из случайных строк настоящего корпуса и записываются в тех же форматах,
+что и исходники: HTML «Тексты песен» (якоря D#_##, припевы в <dir>, строки через <br>),
+файлы ssilki альбомов и документы .docx папки TEXT с частью верифицированных .mp3.json
+"""
+
+import argparse
+import json
+import random
+import re
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from corpus import load_corpus
+from create_volkov_player_json import transliterate_simple
+
+# В якоре D#_## номер трека - две цифры; с ростом числа песен растет число альбомов
+MAX_TRACKS_PER_ALBUM = 99
+VERIFIED_RATE = 0.1
+
+# Строки с остатками разметки (&nbsp; и т.п.) и склеенные при извлечении в материал не берутся
+LINE_PATTERN = re.compile(r'^[^&<>]*[а-яА-ЯёЁ][^&<>]*$')
+MAX_LINE_LENGTH = 80
+# Символы, недопустимые в именах файлов
+FILENAME_PATTERN = re.compile(r'[\\/:*?"<>|]')
+
+DOCX_HEADER = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+               '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+DOCX_FOOTER = '</w:body></w:document>'
+
+def corpus_lines():
+    """Непустые строки настоящего корпуса - материал для синтетических песен"""
+    return [line for poem in load_corpus() for line in poem['text'] if len(line) <= MAX_LINE_LENGTH and LINE_PATTERN.match(line)]
+
+def generate_poems(count, seed=1, lines=None):
+    """
+    Синтетические песни {album, track, title, text, chorus}: 2-6 строф по 4 строки,
+    у части песен припев (повторяется после каждой строфы); песни поровну разложены по альбомам
+    не больше чем по MAX_TRACKS_PER_ALBUM. Название - отдельная случайная строка, не совпадающая
+    со строками текста: разбор HTML выбрасывает из текста строки, равные названию
+    """
+    rng = random.Random(seed)
+    lines = lines or corpus_lines()
+    per_album = -(-count // album_count(count))
+
+    poems = []
+    titles = set()
+    for index in range(count):
+        album, track = index // per_album + 1, index % per_album + 1
+        stanzas = [[rng.choice(lines) for _ in range(4)] for _ in range(rng.randint(2, 6))]
+        chorus = [rng.choice(lines) for _ in range(4)] if rng.random() < 0.4 else []
+
+        # Названия уникальны и годятся для имен файлов, как у настоящих песен
+        poem_lines = {line for stanza in stanzas + [chorus] for line in stanza}
+        title = ''
+        while not title or title in poem_lines:
+            title = FILENAME_PATTERN.sub('', rng.choice(lines)).strip(' !').rstrip('.,;:!?…–- ')
+        if title in titles:
+            title = f"{title} {index}"
+        titles.add(title)
+
+        text = []
+        for stanza in stanzas:
+            if text:
+                text.append("")
+            text.extend(stanza)
+            if chorus:
+                text.append("")
+                text.extend(chorus)
+        poems.append({'album': album, 'track': track, 'title': title, 'stanzas': stanzas,
+                      'chorus': chorus, 'text': text})
+    return poems
+
+def album_count(count):
+    """Число альбомов, при котором номера треков остаются двузначными"""
+    return max(1, -(-count // MAX_TRACKS_PER_ALBUM))
+
+def poem_anchor(poem):
+    return f"D{poem['album']}_{poem['track']:02d}"
+
+def poem_html(poem, previous_anchor):
+    """Блок песни в разметке исходного HTML"""
+    anchor = poem_anchor(poem)
+    parts = [
+        f'<hr size="1">\n</a><center><a name="{previous_anchor}"><font size="+2" face="Comic Sans MS">\n',
+        f'</font></a><font size="+2" face="Comic Sans MS"><a name="{anchor}">{escape(poem["title"])} </a></font>'
+        f'<a name="{anchor}">\n',
+        f'<font size="-2" color="gray"> [Д{poem["album"]}_{poem["track"]:02d}:{poem["track"] + 100}]</font>'
+        f'</a></center><a name="{anchor}"><br>\n',
+        '<table width="100%" cellpadding="0" cellspacing="0"><tbody><tr><td width="49%">\n'
+        '</td><td width="2%" nowrap="">\n\n',
+    ]
+    for i, stanza in enumerate(poem['stanzas']):
+        if i:
+            parts.append('<br>\n')
+        parts.extend(f'{escape(line)}<br>\n' for line in stanza)
+        if poem['chorus']:
+            parts.append('<dir>\n')
+            parts.extend(f'  {escape(line)}<br>\n' for line in poem['chorus'])
+            parts.append('</dir>\n')
+    parts.append('</td><td width="49%"></td></tr></tbody></table>\n')
+    return ''.join(parts)
+
+def write_songs_html(poems, html_file):
+    """HTML «Тексты песен»: оглавление со ссылками на якоря и блоки песен"""
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write('<html><head><meta http-equiv="Content-Type" content="text/html; charset=utf-8">'
+                '</head><body>\n<table><tbody><tr><td><font>\n')
+        for poem in poems:
+            f.write(f'{poem["album"]}_{poem["track"]:02d}: <a href="vo2_text.htm#{poem_anchor(poem)}">'
+                    f'{escape(poem["title"])}</a><br>\n')
+        f.write('</font></td></tr></tbody></table>\n<font face="arial">\n')
+
+        previous = poem_anchor(poems[0]) if poems else ''
+        for poem in poems:
+            f.write(poem_html(poem, previous))
+            previous = poem_anchor(poem)
+        f.write('<br><hr size="1">\n</a></font></body></html>\n')
+
+def audio_link(poem):
+    """Ссылка на MP3 в формате сайта"""
+    slug = transliterate_simple(poem['title'])
+    return f"https://v-volkov.ru/audio/cd{poem['album']}/{poem['album']}{poem['track']:02d}_vlk_{slug}.mp3"
+
+def write_ssilki(poems, ssilki_root):
+    """Файлы 'CD n/ssilki0n.txt' в формате generate_ssilki.py"""
+    albums = {}
+    for poem in poems:
+        albums.setdefault(poem['album'], []).append(poem)
+
+    for album, album_poems in albums.items():
+        album_dir = ssilki_root / f"CD {album}"
+        album_dir.mkdir(parents=True, exist_ok=True)
+        with open(album_dir / f"ssilki0{album}.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Ссылки на аудиофайлы альбома «Синтетический альбом {album}»\n\n")
+            for poem in album_poems:
+                f.write(f"{poem['track']:02d}. {poem['title']} — {audio_link(poem)}\n")
+            f.write("\n")
+
+def docx_bytes(lines):
+    """Минимальный .docx: word/document.xml с абзацем на строку (пустой абзац - разрыв строфы)"""
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' if line else '<w:p/>'
+                   for line in lines)
+    return (DOCX_HEADER + body + DOCX_FOOTER).encode('utf-8')
+
+def write_documents(poems, text_dir, seed=1):
+    """
+    Документы в стиле папки TEXT: '000Название_NN_транслит_192.docx';
+    для доли песен рядом кладется верифицированный текст '<Название>.mp3.json'
+    """
+    rng = random.Random(seed)
+    text_dir.mkdir(parents=True, exist_ok=True)
+    documents = []
+    for index, poem in enumerate(poems):
+        name = f"000{poem['title']}_{index + 1:02d}_{transliterate_simple(poem['title'])}_192"
+        doc_file = text_dir / f"{name}.docx"
+        with zipfile.ZipFile(doc_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('word/document.xml', docx_bytes([poem['title'], ''] + poem['text']))
+        documents.append(doc_file)
+
+        if rng.random() < VERIFIED_RATE:
+            with open(text_dir / f"{poem['title']}.mp3.json", 'w', encoding='utf-8') as f:
+                f.write(poem['title'] + '\n\n' + '\n'.join(poem['text']) + '\n')
+    return documents
+
+def generate_dataset(output_dir, count, documents=None, seed=1):
+    """
+    Полный набор синтетических исходников в output_dir:
+    songs.html, V-VOLKOV/CD n/ssilki0n.txt, TEXT/*.docx (documents штук, по умолчанию count)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    poems = generate_poems(count, seed)
+
+    html_file = output_dir / 'songs.html'
+    write_songs_html(poems, html_file)
+    write_ssilki(poems, output_dir / 'V-VOLKOV')
+    doc_files = write_documents(poems[:count if documents is None else documents], output_dir / 'TEXT', seed)
+
+    manifest = {'count': count, 'documents': len(doc_files), 'seed': seed, 'albums': album_count(count)}
+    with open(output_dir / 'synthetic.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return {'poems': poems, 'html_file': html_file, 'ssilki_root': output_dir / 'V-VOLKOV',
+            'text_dir': output_dir / 'TEXT', 'doc_files': doc_files}
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических исходных данных конвейера")
+    parser.add_argument('output_dir', type=Path, help="папка для данных")
+    parser.add_argument('--count', type=int, default=1000, help="число песен")
+    parser.add_argument('--documents', type=int, default=None, help="число .docx (по умолчанию - все песни)")
+    parser.add_argument('--seed', type=int, default=1, help="зерно генератора")
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.output_dir, args.count, args.documents, args.seed)
+    print(f"{'='*60}")
+    print(f"Poems: {len(dataset['poems'])}, documents: {len(dataset['doc_files'])}")
+    print(f"✓ Created {dataset['html_file']}")
+    print(f"✓ Created {dataset['ssilki_root']}")
+    print(f"✓ Created {dataset['text_dir']}")
+
+if __name__ == '__main__':
+    main()
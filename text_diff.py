@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Автоматическая сверка текстов, извлеченных из .doc (TEXT_EXTRACTED), с эталонами:
+верифицированными текстами TEXT/*.mp3.json и JSON песен альбомов.
+Строки выравниваются по нормализованному тексту, расхождения классифицируются
+(пунктуация, ё/е, слитное/раздельное написание, слова, строки, строфы),
+результат - таблица в формате ORTHOGRAPHY_CHECK_RESULTS.md
+"""
+
+import argparse
+import datetime
+import difflib
+import hashlib
+import re
+import time
+from pathlib import Path
+
+from corpus import BASE_DIR, EXTRACTED_DIR, iter_album_poems
+from verified_texts import read_titled_text
+from fragment_search import normalize_line
+from verified_texts import load_verified_texts, match_verified
+
+REPORT_FILE = BASE_DIR / 'ORTHOGRAPHY_CHECK_AUTO.md'
+
+# Минимальное сходство текстов, при котором песня альбома считается эталоном для документа
+MIN_RATIO = 0.6
+
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+NON_LETTER_PATTERN = re.compile(r'[^\w]+')
+
+CATEGORIES = {
+    'punctuation': 'пунктуация',
+    'yo': 'ё/е',
+    'spacing': 'слитно/раздельно',
+    'word': 'слова',
+    'line': 'строки',
+    'stanza': 'строфы',
+}
+CRITICAL_CATEGORIES = ('word', 'line', 'stanza')
+
+def text_key(lines):
+    """Хеш нормализованного текста (без пунктуации, регистра и различия ё/е)"""
+    normalized = '\n'.join(key for key in (normalize_line(line) for line in lines) if key)
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def raw_key(lines):
+    """Хеш текста как есть, без пустых строк"""
+    return hashlib.sha1('\n'.join(line for line in lines if line).encode('utf-8')).hexdigest()
+
+def classify_fragment(doc_fragment, ref_fragment):
+    """Категория расхождения двух фрагментов строки"""
+    doc_letters = NON_LETTER_PATTERN.sub('', doc_fragment.lower())
+    ref_letters = NON_LETTER_PATTERN.sub('', ref_fragment.lower())
+    if doc_letters.replace('ё', 'е') != ref_letters.replace('ё', 'е'):
+        return 'word'
+    if doc_letters != ref_letters:
+        return 'yo'
+    if normalize_line(doc_fragment) != normalize_line(ref_fragment):
+        return 'spacing'
+    return 'punctuation'
+
+def diff_line(doc_line, ref_line):
+    """Расхождения внутри пары строк: [(категория, фрагмент .doc, фрагмент эталона)]"""
+    if doc_line == ref_line:
+        return []
+
+    doc_tokens = TOKEN_PATTERN.findall(doc_line)
+    ref_tokens = TOKEN_PATTERN.findall(ref_line)
+    matcher = difflib.SequenceMatcher(None, doc_tokens, ref_tokens, autojunk=False)
+
+    diffs = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        category = classify_fragment(' '.join(doc_tokens[i1:i2]), ' '.join(ref_tokens[j1:j2]))
+        # Для наглядности показываем соседние слова
+        start_doc, start_ref = max(i1 - 1, 0), max(j1 - 1, 0)
+        diffs.append((
+            category,
+            _join_tokens(doc_tokens[start_doc:i2 + 1]),
+            _join_tokens(ref_tokens[start_ref:j2 + 1])
+        ))
+    return diffs
+
+def _join_tokens(tokens):
+    text = ''
+    for token in tokens:
+        if text and (token[0].isalnum() or token in '«—–(') and not text.endswith(('«', '(', '-')):
+            text += ' '
+        text += token
+    return text
+
+def _stanzas(lines):
+    """Непустые строки и номер строфы для каждой из них"""
+    result = []
+    stanza = 0
+    for line in lines:
+        if line:
+            result.append((line, stanza))
+        elif result and result[-1][1] == stanza:
+            stanza += 1
+    return result
+
+def compare_texts(doc_lines, ref_lines):
+    """Выравнивает строки документа и эталона, возвращает список расхождений"""
+    if raw_key(doc_lines) == raw_key(ref_lines):
+        return []
+
+    doc = [line for line in doc_lines if line]
+    ref = _stanzas(ref_lines)
+    ref_text = [line for line, _ in ref]
+
+    if text_key(doc_lines) == text_key(ref_lines):
+        # Тексты совпадают с точностью до пунктуации и ё: строки уже выровнены
+        pairs = zip(doc, ref_text)
+        return [diff for doc_line, ref_line in pairs for diff in diff_line(doc_line, ref_line)]
+
+    matcher = difflib.SequenceMatcher(None, [normalize_line(line) for line in doc],
+                                      [normalize_line(line) for line in ref_text], autojunk=False)
+    diffs = []
+    missing = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal' or tag == 'replace':
+            if tag == 'replace' and (i2 - i1) != (j2 - j1):
+                joined_doc = ' '.join(doc[i1:i2])
+                joined_ref = ' '.join(ref_text[j1:j2])
+                if normalize_line(joined_doc) == normalize_line(joined_ref):
+                    # Строка разбита или объединена по-другому
+                    diffs.append(('line', ' / '.join(doc[i1:i2]), ' / '.join(ref_text[j1:j2])))
+                    continue
+            for k in range(min(i2 - i1, j2 - j1)):
+                diffs.extend(diff_line(doc[i1 + k], ref_text[j1 + k]))
+            if i2 - i1 > j2 - j1:
+                for k in range(i1 + (j2 - j1), i2):
+                    diffs.append(('line', doc[k], '—'))
+            missing.extend(range(j1 + (i2 - i1), j2))
+        elif tag == 'delete':
+            for k in range(i1, i2):
+                diffs.append(('line', doc[k], '—'))
+        elif tag == 'insert':
+            missing.extend(range(j1, j2))
+
+    # Отсутствующие строфы целиком, остальные отсутствующие строки по одной
+    missing = set(missing)
+    stanza_lines = {}
+    for index, (_, stanza) in enumerate(ref):
+        stanza_lines.setdefault(stanza, []).append(index)
+    for stanza, indexes in stanza_lines.items():
+        if all(index in missing for index in indexes):
+            diffs.append(('stanza', '—', ' / '.join(ref_text[index] for index in indexes)))
+            missing.difference_update(indexes)
+    for index in sorted(missing):
+        diffs.append(('line', '—', ref_text[index]))
+
+    return diffs
+
+def text_words(lines):
+    """Нормализованные слова текста для сравнения целых песен"""
+    return [word for line in lines for word in normalize_line(line).split()]
+
+class ReferenceMatcher:
+    """
+    Поиск эталона среди текстов альбомов с дешевыми предфильтрами:
+    совпадение хеша, real_quick_ratio и quick_ratio перед полным ratio
+    """
+
+    def __init__(self, references, min_ratio=MIN_RATIO):
+        self.references = references
+        self.min_ratio = min_ratio
+        self.by_key = {}
+        self.words = []
+        for index, reference in enumerate(references):
+            self.by_key.setdefault(text_key(reference['text']), index)
+            self.words.append(text_words(reference['text']))
+        self.stats = {'pairs': 0, 'hash': 0, 'real_quick': 0, 'quick': 0, 'full': 0}
+
+    def best_match(self, lines):
+        """Лучший эталон для текста: (сходство, эталон) или None"""
+        index = self.by_key.get(text_key(lines))
+        self.stats['pairs'] += len(self.references)
+        if index is not None:
+            self.stats['hash'] += 1
+            return 1.0, self.references[index]
+
+        matcher = difflib.SequenceMatcher(None, autojunk=False)
+        # Второй последовательностью кешируется текст документа, перебираются эталоны
+        matcher.set_seq2(text_words(lines))
+        best = None
+        for index, candidate in enumerate(self.words):
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < self.min_ratio:
+                self.stats['real_quick'] += 1
+                continue
+            if matcher.quick_ratio() < self.min_ratio:
+                self.stats['quick'] += 1
+                continue
+            self.stats['full'] += 1
+            ratio = matcher.ratio()
+            if ratio >= self.min_ratio and (best is None or ratio > best[0]):
+                best = (ratio, self.references[index])
+        return best
+
+def iter_extracted_documents(extracted_dir=EXTRACTED_DIR):
+    """Тексты документов из TEXT_EXTRACTED как есть (без подстановки верифицированных)"""
+    for txt_file in sorted(extracted_dir.glob('*.txt')):
+        title, text = read_titled_text(txt_file)
+        if text:
+            yield txt_file, title, text
+
+def check_documents(min_ratio=MIN_RATIO):
+    """
+    Сверяет каждый документ с эталоном: верифицированным текстом по названию,
+    иначе наиболее похожей песней альбомов. Возвращает (результаты, статистика предфильтров)
+    """
+    verified_texts = load_verified_texts()
+    matcher = ReferenceMatcher(list(iter_album_poems()), min_ratio)
+
+    results = []
+    for txt_file, title, text in iter_extracted_documents():
+        verified = match_verified(title, verified_texts)
+        if verified:
+            reference_name = f"TEXT/{verified['source_file']}"
+            reference_text = verified['text']
+            heading = verified['heading']
+            name = verified['title']
+        else:
+            match = matcher.best_match(text)
+            if match is None:
+                continue
+            reference_name = f"STIHI_VOLKOV/{match[1]['id']}.json"
+            reference_text = match[1]['text']
+            heading = name = match[1]['title']
+
+        # В эталоне заголовок отделен от текста, а в документе он часто повторен первой строкой
+        if text and normalize_line(text[0]) == normalize_line(heading):
+            text = text[1:]
+
+        results.append({
+            'title': name,
+            'document': txt_file.name,
+            'reference': reference_name,
+            'diffs': compare_texts(text, reference_text)
+        })
+    return results, matcher.stats
+
+def status_of(diffs):
+    """Статус песни в таблице: (значок и текст для таблицы, заголовок подробного раздела)"""
+    if not diffs:
+        return "✅ Идеально", "✅ ИДЕАЛЬНО"
+    if any(category in CRITICAL_CATEGORIES for category, _, _ in diffs):
+        return "🔴 Критичные расхождения", "🔴 КРИТИЧНЫЕ РАСХОЖДЕНИЯ"
+    return "⚠️ Ошибки найдены", "⚠️ ОШИБКИ НАЙДЕНЫ"
+
+def format_report(results):
+    """Отчет в формате ORTHOGRAPHY_CHECK_RESULTS.md"""
+    lines = [
+        "# Проверка орфографии и пунктуации - Результаты (автоматически)",
+        "",
+        f"Дата проверки: {datetime.date.today().isoformat()}",
+        "",
+        f"Проверено {len(results)} песен: тексты из .doc сравнены с верифицированными "
+        f".json файлами и песнями альбомов (text_diff.py).",
+        "",
+        "## Статус проверки",
+        "",
+        "| № | Название | Статус | Количество ошибок |",
+        "|---|----------|--------|-------------------|",
+    ]
+    for number, result in enumerate(results, 1):
+        status, _ = status_of(result['diffs'])
+        lines.append(f"| {number} | {result['title']} | {status} | {len(result['diffs'])} |")
+
+    lines += ["", "## Детальные результаты", ""]
+    for number, result in enumerate(results, 1):
+        _, heading = status_of(result['diffs'])
+        count = len(result['diffs'])
+        lines.append(f"### {number}. {result['title']}")
+        lines.append(f"**Статус**: {heading}" + (f" ({count} ошибок)" if count else ""))
+        lines.append("")
+        lines.append(f"Документ: `{result['document']}`, эталон: `{result['reference']}`")
+        lines.append("")
+        if not count:
+            lines.append("Текст из .doc полностью совпадает с эталоном.")
+        else:
+            lines.append("Расхождения в .doc версии:")
+            lines.append("")
+            for i, (category, doc_fragment, ref_fragment) in enumerate(result['diffs'], 1):
+                lines.append(f"{i}. `{doc_fragment}` → `{ref_fragment}` ({CATEGORIES[category]})")
+        lines += ["", "---", ""]
+
+    lines += ["## Общие выводы", "", "| Категория | Количество |", "|-----------|------------|"]
+    for category, name in CATEGORIES.items():
+        total = sum(1 for result in results for diff in result['diffs'] if diff[0] == category)
+        lines.append(f"| {name} | {total} |")
+    return '\n'.join(lines) + '\n'
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка текстов из .doc с верифицированными текстами")
+    parser.add_argument('--output', type=Path, default=REPORT_FILE, help="файл отчета")
+    parser.add_argument('--min-ratio', type=float, default=MIN_RATIO,
+                        help="минимальное сходство для сопоставления с песней альбома")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results, stats = check_documents(args.min_ratio)
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(format_report(results))
+
+    print(f"{'='*60}")
+    for result in results:
+        status, _ = status_of(result['diffs'])
+        print(f"  {len(result['diffs']):4}  {status:28} {result['title']}")
+    print(f"{'='*60}")
+    print(f"Compared: {len(results)} documents, time: {elapsed:.2f}s")
+    print(f"Album pairs: {stats['pairs']}, hash hits: {stats['hash']}, "
+          f"pruned by real_quick_ratio: {stats['real_quick']}, by quick_ratio: {stats['quick']}, "
+          f"full ratio: {stats['full']}")
+    print(f"✓ Saved {args.output}")
+
+if __name__ == '__main__':
+    main()
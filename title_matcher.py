@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сопоставление названий песен из разных источников с каноническими id корпуса
+Названия в именах файлов TEXT, «Списке всех песен», выгрузках Mp3tag, ssilki и JSON песен
+различаются префиксами, нумерацией, транслитом и пунктуацией. Индекс по нормализованным словам
+и символьным триграммам находит кандидатов без попарного перебора и оценивает уверенность
+"""
+
+import argparse
+import json
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+from corpus import BASE_DIR, load_corpus
+from mp3tag_html import HTML_DIR, iter_mp3tag_files, iter_mp3tag_rows
+from verified_texts import normalize_title
+
+TEXT_DIR = BASE_DIR / 'TEXT'
+SONG_LIST_FILE = BASE_DIR / 'V-VOLKOV' / 'Список всех песен.txt'
+SSILKI_DIR = BASE_DIR / 'VOLKOV2.0'
+MATCHES_FILE = BASE_DIR / 'JSON' / 'title_matches.json'
+
+# Уверенность, ниже которой сопоставление считается ненадежным
+MIN_CONFIDENCE = 0.5
+
+FILE_PREFIX_PATTERN = re.compile(r'^(?:000|ААА-)')
+# Хвост имени документа: _<номер>_<транслит>[_192]
+FILE_SUFFIX_PATTERN = re.compile(r'_\d+(?:_[a-z0-9]+)*$')
+NUMBER_PREFIX_PATTERN = re.compile(r'^\s*\d+(?:_\d+)?\s*[.:)]\s*')
+EXTENSION_PATTERN = re.compile(r'(?:\.mp3)?\.(?:docx?|mp3|json|txt)$', re.IGNORECASE)
+
+def clean_title(raw):
+    """Убирает из названия служебные части источников: префиксы 000/ААА-, номера, хвосты _NN_translit, расширения"""
+    title = EXTENSION_PATTERN.sub('', raw.strip())
+    title = FILE_PREFIX_PATTERN.sub('', title)
+    title = FILE_SUFFIX_PATTERN.sub('', title)
+    title = NUMBER_PREFIX_PATTERN.sub('', title)
+    return title.replace('_', ' ').strip()
+
+def title_trigrams(normalized):
+    """Символьные триграммы нормализованного названия"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TitleIndex:
+    """Индекс канонических названий: нормализованное название, слова и триграммы -> номера записей"""
+
+    def __init__(self, entries):
+        # [(id, название)]; названия ранних песен взяты из имен документов и тоже очищаются
+        self.entries = [(song_id, clean_title(title)) for song_id, title in entries]
+        self.exact = {}
+        self.tokens = {}
+        self.trigrams = {}
+        self.token_sets = []
+        self.trigram_counts = []
+
+        for index, (_, title) in enumerate(self.entries):
+            normalized = normalize_title(title)
+            self.exact.setdefault(normalized, index)
+
+            tokens = set(normalized.split())
+            self.token_sets.append(tokens)
+            for token in tokens:
+                self.tokens.setdefault(token, []).append(index)
+
+            trigrams = title_trigrams(normalized)
+            self.trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self.trigrams.setdefault(trigram, []).append(index)
+
+    def match(self, raw_title, limit=3):
+        """Лучшие кандидаты для названия: [(уверенность, id, каноническое название)]"""
+        normalized = normalize_title(clean_title(raw_title))
+        if not normalized:
+            return []
+
+        index = self.exact.get(normalized)
+        if index is not None:
+            return [(1.0, *self.entries[index])]
+
+        query_tokens = set(normalized.split())
+        query_trigrams = title_trigrams(normalized)
+
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.trigrams.get(trigram, ()))
+        # Кандидаты по словам добавляются даже без общих триграмм (короткие названия)
+        for token in query_tokens:
+            for index in self.tokens.get(token, ()):
+                shared[index] += 0
+
+        scored = []
+        for index, common in shared.items():
+            dice = 2.0 * common / (len(query_trigrams) + self.trigram_counts[index])
+            tokens = self.token_sets[index]
+            # Доля слов канонического названия, найденных в запросе: названия документов
+            # часто длиннее ("Послушай друг_Встреча в купе")
+            containment = len(tokens & query_tokens) / len(tokens) if tokens else 0.0
+            confidence = round(0.6 * dice + 0.4 * containment, 3)
+            scored.append((confidence, index))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(confidence, *self.entries[index]) for confidence, index in scored[:limit]]
+
+    def resolve(self, raw_title):
+        """Лучший кандидат: (уверенность, id, каноническое название) или None"""
+        matches = self.match(raw_title, limit=1)
+        return matches[0] if matches else None
+
+def canonical_entries():
+    """Канонические песни: стихотворения альбомов и ранние песни корпуса"""
+    return [(poem['id'], poem['title']) for poem in load_corpus(('album', 'extracted'))]
+
+def iter_text_filenames(text_dir=TEXT_DIR):
+    """Названия из имен документов и файлов папки TEXT"""
+    for path in sorted(text_dir.iterdir()):
+        if path.suffix.lower() in ('.doc', '.docx', '.mp3') or path.name.endswith('.mp3.json'):
+            yield path.name
+
+def iter_song_list(song_list_file=SONG_LIST_FILE):
+    """Названия из «Списка всех песен» (строки вида '1_01: Название')"""
+    with open(song_list_file, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            if re.match(r'^\d+_\d+:', line):
+                yield line.strip()
+
+def iter_mp3tag_titles(html_dir=HTML_DIR):
+    """Колонка Title выгрузок Mp3tag"""
+    for html_file in iter_mp3tag_files(html_dir):
+        for row in iter_mp3tag_rows(html_file):
+            yield row.get('title', '')
+
+def iter_ssilki_titles(ssilki_dir=SSILKI_DIR):
+    """Названия из файлов ssilki (строки '01. Название — ссылка')"""
+    for ssilki_file in sorted(ssilki_dir.glob('ssilki*.txt')):
+        with open(ssilki_file, 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                if ' — ' in line and re.match(r'^\d+\.', line):
+                    yield line.split(' — ')[0].strip()
+
+def iter_poem_json_titles():
+    """Названия из JSON песен STIHI_VOLKOV"""
+    for poem in load_corpus(('album',)):
+        yield poem['title']
+
+TITLE_SOURCES = {
+    'text_files': iter_text_filenames,
+    'song_list': iter_song_list,
+    'mp3tag': iter_mp3tag_titles,
+    'ssilki': iter_ssilki_titles,
+    'poem_json': iter_poem_json_titles,
+}
+
+def match_sources(index, sources=TITLE_SOURCES):
+    """Сопоставляет названия всех источников: {источник: [{title, id, canonical, confidence}]}"""
+    results = {}
+    for source, loader in sources.items():
+        matches = []
+        for raw_title in loader():
+            best = index.resolve(raw_title)
+            matches.append({
+                'title': raw_title,
+                'id': best[1] if best else None,
+                'canonical': best[2] if best else None,
+                'confidence': best[0] if best else 0.0
+            })
+        results[source] = matches
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Сопоставление названий песен из разных источников")
+    parser.add_argument('titles', nargs='*', help="названия для проверки (без них - все источники)")
+    parser.add_argument('--output', type=Path, default=MATCHES_FILE, help="файл результатов")
+    args = parser.parse_args()
+
+    index = TitleIndex(canonical_entries())
+
+    if args.titles:
+        for raw_title in args.titles:
+            print(f"{raw_title}:")
+            for confidence, song_id, title in index.match(raw_title):
+                print(f"  {confidence:.3f}  {song_id}  {title}")
+        return
+
+    start = time.perf_counter()
+    results = match_sources(index)
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    total = sum(len(matches) for matches in results.values())
+    print(f"{'='*60}")
+    print(f"Canonical songs: {len(index.entries)}")
+    for source, matches in results.items():
+        exact = sum(1 for match in matches if match['confidence'] == 1.0)
+        weak = [match for match in matches if match['confidence'] < MIN_CONFIDENCE]
+        print(f"  {source:12} {len(matches):4} titles, {exact:4} exact, {len(weak):3} below {MIN_CONFIDENCE}")
+        for match in weak:
+            print(f"      ? {match['title']} -> {match['canonical']} ({match['confidence']:.3f})")
+    print(f"{'='*60}")
+    print(f"Titles: {total}, time: {elapsed * 1000:.1f} ms")
+    print(f"✓ Saved {args.output}")
+
+if __name__ == '__main__':
+    main()
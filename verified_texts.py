@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Верифицированные тексты песен из TEXT/*.mp3.json
+Несмотря на расширение, это текстовые файлы: заголовок песни, пустая строка и текст.
+Они сверены вручную (см. ORTHOGRAPHY_CHECK_RESULTS.md) и имеют приоритет над .doc.
+Здесь же общие для источников текстов функции: нормализация названий и очистка строк
+"""
+
+import re
+from pathlib import Path
+
+TEXT_DIR = Path('/home/user/VLK/TEXT')
+VERIFIED_SUFFIX = '.mp3.json'
+
+NON_WORD_PATTERN = re.compile(r'[^0-9a-zа-я]+')
+
+def normalize_title(title):
+    """Название для сравнения: нижний регистр, ё→е, только буквы и цифры через пробел"""
+    return NON_WORD_PATTERN.sub(' ', title.lower().replace('ё', 'е')).strip()
+
+def clean_text_lines(raw_lines):
+    """Обрезает пробелы, схлопывает подряд идущие пустые строки, убирает пустые края"""
+    lines = []
+    for line in raw_lines:
+        stripped = line.strip()
+        if stripped:
+            lines.append(stripped)
+        elif lines and lines[-1] != "":
+            lines.append("")
+
+    while lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+def read_titled_text(path):
+    """Читает текстовый файл вида 'Название, пустая строка, текст'"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        raw_lines = f.read().splitlines()
+
+    lines = clean_text_lines(raw_lines)
+    if not lines:
+        return None, []
+
+    title = lines[0]
+    text = lines[1:]
+    while text and text[0] == "":
+        text.pop(0)
+    return title, text
+
+def parse_verified_text(filepath):
+    """Разбирает .mp3.json: {title, heading, text, source_file}"""
+    filepath = Path(filepath)
+    heading, text = read_titled_text(filepath)
+
+    return {
+        'title': filepath.name[:-len(VERIFIED_SUFFIX)],
+        'heading': heading or "",
+        'text': text,
+        'source_file': filepath.name
+    }
+
+def load_verified_texts(text_dir=TEXT_DIR):
+    """Все верифицированные тексты папки TEXT в порядке имен файлов"""
+    return [parse_verified_text(path) for path in sorted(text_dir.glob(f'*{VERIFIED_SUFFIX}'))]
+
+def match_verified(title, verified_texts):
+    """
+    Верифицированный текст для названия из имени документа.
+    Имена документов содержат хвосты вида '_20_krugom', поэтому нормализованное
+    название верифицированного текста должно совпасть с началом названия документа по словам
+    """
+    normalized = normalize_title(title)
+    best = None
+    for verified in verified_texts:
+        key = normalize_title(verified['title'])
+        if key and (normalized == key or normalized.startswith(key + ' ')):
+            if best is None or len(key) > len(normalize_title(best['title'])):
+                best = verified
+    return best
+
+if __name__ == '__main__':
+    for verified in load_verified_texts():
+        print(f"{verified['source_file']}: {verified['heading']} ({len(verified['text'])} lines)")